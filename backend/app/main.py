@@ -1,15 +1,42 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, SessionLocal
+from fastapi.responses import PlainTextResponse
+from .database import engine
 from .models import models
 from .routes import task_routes
+from .routes.task_routes import get_task_service
+from .services.parse_pool import parse_pool
+from .services.profiler import profiler
 from .services.task_processor import TaskProcessor
-import asyncio
+from .services.task_service import TaskService
+
+# Start the sampling profiler with the app; it can also be toggled at runtime
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
 
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Ecommerce Data API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One processor per application; routes reach it through app.state
+    processor = TaskProcessor()
+    app.state.processor = processor
+    await processor.start()
+    if PROFILER_ENABLED:
+        profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        # Lets in-flight tasks finish before the process exits
+        await processor.stop_processing()
+        await processor.connectors.close()
+        parse_pool.shutdown()
+
+app = FastAPI(title="Ecommerce Data API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -18,20 +45,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Task-Outcome"],
 )
 
-# Initialize task processor
-@app.on_event("startup")
-async def startup_event():
-    db = SessionLocal()
-    processor = TaskProcessor(db)
-    loop = asyncio.get_event_loop()
-    loop.create_task(processor.start_processing())
-
 # Include routers
 app.include_router(task_routes.router, prefix="/api")
 
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Ecommerce Sales Data API"} 
\ No newline at end of file
+    return {"message": "Welcome to Ecommerce Sales Data API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(task_service: TaskService = Depends(get_task_service)):
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(await task_service.render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE) 
\ No newline at end of file
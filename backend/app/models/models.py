@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Boolean, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
@@ -9,6 +9,8 @@ class TaskStatus(enum.Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
+    PARTIALLY_COMPLETED = "partially_completed"
+    FAILED = "failed"  # Gave up after the last attempt; never queued again
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -19,6 +21,10 @@ class Task(Base):
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING)
     created_at = Column(DateTime)
     completed_at = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime, nullable=True)  # Source orders synced up to here are reflected
+    source_errors = Column(JSON, nullable=True)  # Per-source failure reasons
+    # Bumped when shared orders of a finished task change under it
+    revision = Column(Integer, default=0)
     
     # Filter parameters
     date_from = Column(DateTime)
@@ -27,15 +33,19 @@ class Task(Base):
     source_b_enabled = Column(Boolean, default=True)
     source_a_filters = Column(JSON)  # For Shopify-specific filters
     source_b_filters = Column(JSON)  # For Etsy-specific filters
+    # [{"name": ..., "filters": {...}}]; NULL for tasks created with the flags above
+    connectors = Column(JSON, nullable=True)
+    # Hash of the date range and connectors; identical requests share it
+    fingerprint = Column(String, index=True, nullable=True)
     
-    # Relationship with orders
-    orders = relationship("Order", back_populates="task")
+    # Orders matched by the task's filters
+    task_orders = relationship("TaskOrder", back_populates="task")
 
-class Order(Base):
-    __tablename__ = "orders"
+class SourceOrder(Base):
+    """An order as read from a source, stored once however many tasks match it"""
+    __tablename__ = "source_orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"))
     source = Column(String)  # 'source_a' or 'source_b'
     
     # Common fields across all sources
@@ -55,6 +65,74 @@ class Order(Base):
     
     # Source-specific data stored as JSON
     source_specific_data = Column(JSON)
-    
-    # Relationship with task
-    task = relationship("Task", back_populates="orders") 
\ No newline at end of file
+
+    # When the row was first stored or last changed by a source sync
+    synced_at = Column(DateTime, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("source", "order_id", name="uq_source_orders_source_order_id"),
+        Index("ix_source_orders_category_date", "product_category", "order_date"),
+    )
+
+class TaskOrder(Base):
+    """Membership of a source order in a task's result"""
+    __tablename__ = "task_orders"
+
+    task_id = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    source_order_id = Column(Integer, ForeignKey("source_orders.id"), primary_key=True)
+
+    task = relationship("Task", back_populates="task_orders")
+    source_order = relationship("SourceOrder")
+
+class SourceSyncState(Base):
+    """How far a source file has been loaded into ``source_orders``"""
+    __tablename__ = "source_sync_state"
+
+    source = Column(String, primary_key=True)
+    path = Column(String)
+    byte_offset = Column(Integer, default=0)  # End of the last record loaded
+    fingerprint = Column(String)  # Hash of the bytes around the offset
+    file_size = Column(Integer)
+    max_order_date = Column(DateTime, nullable=True)
+    rows_synced = Column(Integer, default=0)
+    synced_at = Column(DateTime)
+
+class TaskRollup(Base):
+    """Order totals of a finished task per time bucket, source and category"""
+    __tablename__ = "task_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    bucket = Column(String)  # 'day', 'week' or 'month'
+    period = Column(String)  # Start of the bucket as YYYY-MM-DD
+    source = Column(String)
+    product_category = Column(String)
+    total_amount = Column(Float)
+    order_count = Column(Integer)
+    first_order_date = Column(DateTime)
+    last_order_date = Column(DateTime)
+
+class TaskCountryRollup(Base):
+    """Order totals of a finished task per customer country"""
+    __tablename__ = "task_country_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), index=True)
+    customer_country = Column(String)
+    total_amount = Column(Float)
+    order_count = Column(Integer)
+
+class TaskQueueEntry(Base):
+    """A task waiting to be processed, or leased by the worker processing it"""
+    __tablename__ = "task_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), unique=True)
+    enqueued_at = Column(DateTime)
+    lease_owner = Column(String, nullable=True)  # host:pid:instance:worker
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+
+    __table_args__ = (
+        Index("ix_task_queue_lease", "lease_owner", "lease_expires_at"),
+    )
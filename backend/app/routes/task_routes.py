@@ -1,14 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
-from ..database import get_db
-from ..services.task_service import TaskService
-from ..models.models import Task, Order, TaskStatus
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import math
+from typing import List, Dict, Literal, Optional
+from ..database import get_async_db
+from ..services.task_service import TaskService, DEFAULT_PAGE_SIZE, FAST_JSON, encode_rows
+from ..services.task_events import task_events
+from ..services.order_query import OrderQuery, InvalidOrderQueryError, parse_fields, parse_sort
+from ..services.connectors import UnknownConnectorError
+from ..services.task_processor import TaskNotFinishedError, TaskQueueFullError
+from ..services.profiler import PROFILER_API_ENABLED, profiler
+from ..services.rate_limit import task_rate_limiter
+from ..services.response_cache import (
+    CachedResponse,
+    etag_matches,
+    request_key,
+    response_cache,
+    task_version,
+)
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
+import asyncio
+import json
 
 router = APIRouter()
 
+SSE_KEEPALIVE_SECONDS = 15
+
+def get_task_service(request: Request, db: AsyncSession = Depends(get_async_db)) -> TaskService:
+    """TaskService bound to the request's session and the app-wide processor"""
+    return TaskService(db, request.app.state.processor)
+
+class ConnectorSpec(BaseModel):
+    name: str
+    filters: Optional[Dict] = None
+
 class TaskCreate(BaseModel):
     title: str
     description: str
@@ -18,6 +45,8 @@ class TaskCreate(BaseModel):
     source_b_enabled: bool = True
     source_a_filters: Optional[Dict] = None
     source_b_filters: Optional[Dict] = None
+    # Replaces the source_a/source_b fields above when given
+    connectors: Optional[List[ConnectorSpec]] = None
 
 class TaskResponse(BaseModel):
     id: int
@@ -26,16 +55,34 @@ class TaskResponse(BaseModel):
     status: str
     created_at: datetime
     completed_at: Optional[datetime] = None
+    synced_at: Optional[datetime] = None
+    source_errors: Optional[Dict[str, str]] = None
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     source_a_enabled: bool
     source_b_enabled: bool
     source_a_filters: Optional[Dict] = None
     source_b_filters: Optional[Dict] = None
+    connectors: Optional[List[ConnectorSpec]] = None
 
     class Config:
         from_attributes = True
 
+class SourceSyncResponse(BaseModel):
+    source: str
+    mode: str
+    rows: int
+    byte_offset: int
+    max_order_date: Optional[datetime] = None
+
+class TaskRefreshResponse(BaseModel):
+    task: TaskResponse
+    sources: Dict[str, SourceSyncResponse]
+    orders_added: int
+    orders_removed: int
+    # Other tasks sharing orders the refresh overwrote
+    tasks_updated: List[int] = []
+
 class OrderResponse(BaseModel):
     id: int
     task_id: int
@@ -54,37 +101,334 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class SourceTotal(BaseModel):
+    source: str
+    total: float
+    count: int
+
+class CategoryTotal(BaseModel):
+    category: str
+    total: float
+    count: int
+
+class CategorySourceTotal(BaseModel):
+    category: str
+    source: str
+    total: float
+    count: int
+
+class CountryTotal(BaseModel):
+    country: str
+    total: float
+    count: int
+
+class TaskStatsResponse(BaseModel):
+    total_sales: float
+    total_orders: int
+    average_order_value: float
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    sources: List[SourceTotal]
+    top_categories: List[CategoryTotal]
+    top_countries: List[CountryTotal]
+    # Every category, overall and per source
+    categories: List[CategoryTotal] = []
+    category_sources: List[CategorySourceTotal] = []
+
+class TimeSeriesPoint(BaseModel):
+    period: str
+    source: str
+    total: float
+    count: int
+
+ORDER_LIST = TypeAdapter(List[OrderResponse])
+
+def cached_response(request: Request, entry: CachedResponse) -> Response:
+    """A cached body in the best encoding the client accepts, or a 304 if it has it already"""
+    headers = {
+        **entry.headers,
+        "ETag": entry.etag,
+        # Clients may keep the body but must revalidate it
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.count_not_modified()
+        return Response(status_code=304, headers=headers)
+    encoding, body = entry.negotiate(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=entry.media_type, headers=headers)
+
 @router.get("/tasks/", response_model=List[TaskResponse])
-async def get_tasks(db: Session = Depends(get_db)):
-    task_service = TaskService(db)
+async def get_tasks(task_service: TaskService = Depends(get_task_service)):
+    if FAST_JSON:
+        return Response(await task_service.get_all_tasks_json(), media_type="application/json")
     return await task_service.get_all_tasks()
 
 @router.post("/tasks/", response_model=TaskResponse)
-async def create_task(task: TaskCreate, db: Session = Depends(get_db)):
-    task_service = TaskService(db)
-    return await task_service.create_task(
-        title=task.title,
-        description=task.description,
-        date_from=task.date_from,
-        date_to=task.date_to,
-        source_a_enabled=task.source_a_enabled,
-        source_b_enabled=task.source_b_enabled,
-        source_a_filters=task.source_a_filters,
-        source_b_filters=task.source_b_filters,
+async def create_task(
+    task: TaskCreate,
+    request: Request,
+    response: Response,
+    task_service: TaskService = Depends(get_task_service),
+):
+    """Create a task, or return an identical queued, running or recently completed one.
+
+    The ``X-Task-Outcome`` header says which: created, coalesced or reused.
+    """
+    wait = task_rate_limiter.acquire(request.client.host if request.client else "unknown")
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many tasks created, please retry later",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    try:
+        created, outcome = await task_service.submit_task(
+            title=task.title,
+            description=task.description,
+            date_from=task.date_from,
+            date_to=task.date_to,
+            source_a_enabled=task.source_a_enabled,
+            source_b_enabled=task.source_b_enabled,
+            source_a_filters=task.source_a_filters,
+            source_b_filters=task.source_b_filters,
+            connectors=[c.model_dump() for c in task.connectors] if task.connectors is not None else None,
+        )
+    except UnknownConnectorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TaskQueueFullError:
+        raise HTTPException(
+            status_code=429,
+            detail="Task queue is full, please retry later",
+            headers={"Retry-After": "5"},
+        )
+    response.headers["X-Task-Outcome"] = outcome
+    return created
+
+@router.get("/tasks/stream")
+async def stream_task_events(request: Request, task_id: Optional[int] = None):
+    """Server-Sent Events with task status transitions and ingest progress.
+
+    Pass ``task_id`` to only receive the events of one task.
+    """
+    async def event_stream():
+        queue = task_events.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeping proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                if task_id is not None and event["task_id"] != task_id:
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+        finally:
+            task_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
+@router.get("/connectors")
+async def get_connectors(task_service: TaskService = Depends(get_task_service)):
+    """Registered connectors with their limits and request counters"""
+    return task_service.get_connectors()
+
+@router.get("/processor/metrics")
+async def get_processor_metrics(task_service: TaskService = Depends(get_task_service)):
+    return await task_service.get_processor_metrics()
+
+def require_profiler_api():
+    """Hide the profiler endpoints unless PROFILER_API is set"""
+    if not PROFILER_API_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@router.get("/profiler", dependencies=[Depends(require_profiler_api)])
+async def get_profiler(top: int = Query(20, ge=1, le=200), include_idle: bool = False):
+    """Sampling profiler state and the functions it saw running most often"""
+    return {**profiler.get_status(), "top": profiler.top(top, include_idle)}
+
+@router.post("/profiler/start", dependencies=[Depends(require_profiler_api)])
+async def start_profiler(interval_ms: float = Query(10, gt=0, le=1000), reset: bool = True):
+    profiler.start(interval_ms / 1000, reset=reset)
+    return profiler.get_status()
+
+@router.post("/profiler/stop", dependencies=[Depends(require_profiler_api)])
+async def stop_profiler():
+    # Joining the sampler thread takes up to one interval
+    await asyncio.to_thread(profiler.stop)
+    return profiler.get_status()
+
+@router.get("/profiler/stacks", dependencies=[Depends(require_profiler_api)])
+async def get_profiler_stacks():
+    """Sampled stacks in the folded format read by flame graph tools"""
+    return Response(profiler.folded(), media_type="text/plain")
+
 @router.get("/tasks/{task_id}", response_model=TaskResponse)
-async def get_task_status(task_id: int, db: Session = Depends(get_db)):
-    task_service = TaskService(db)
+async def get_task_status(task_id: int, request: Request, task_service: TaskService = Depends(get_task_service)):
     task = await task_service.get_task_status(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    version = task_version(task)
+    if version is None:
+        # Still changing; not worth an ETag
+        return task
+    key = request_key(request.url.path, request.query_params.multi_items())
+    entry = response_cache.get(task_id, version, key)
+    if entry is None:
+        entry = response_cache.build(TaskResponse.model_validate(task).model_dump_json().encode(), "application/json")
+        response_cache.put(task_id, version, key, entry)
+    return cached_response(request, entry)
+
+@router.post("/tasks/{task_id}/refresh", response_model=TaskRefreshResponse)
+async def refresh_task(task_id: int, task_service: TaskService = Depends(get_task_service)):
+    """Update a finished task with the source records added or changed since it last ran.
+
+    Only the new part of each source is loaded, and only the orders it
+    touched are re-evaluated against the task's filters.
+    """
+    try:
+        refreshed = await task_service.refresh_task(task_id)
+    except TaskNotFinishedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if refreshed is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task, summary = refreshed
+    return TaskRefreshResponse(task=TaskResponse.model_validate(task), **summary)
 
 @router.get("/tasks/{task_id}/data", response_model=List[OrderResponse])
-async def get_task_data(task_id: int, db: Session = Depends(get_db)):
-    task_service = TaskService(db)
-    data = await task_service.get_task_data(task_id)
-    if not data:
+async def get_task_data(
+    task_id: int,
+    request: Request,
+    source: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    country: Optional[List[str]] = Query(None),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    sort: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    task_service: TaskService = Depends(get_task_service),
+):
+    """Orders of a task.
+
+    Orders can be filtered by ``source``, ``category`` and ``country`` (each
+    repeatable), an order date range and an amount range. ``sort`` takes
+    comma-separated keys, prefixed with ``-`` for descending order, and
+    ``fields`` limits the columns returned. With ``limit`` or ``cursor`` the
+    orders are paginated and the next page's cursor is returned in the
+    ``X-Next-Cursor`` header. ``format=ndjson`` streams one JSON object per
+    line instead, paged the same way when given ``limit`` or ``cursor``.
+
+    JSON responses of finished tasks are cached and carry an ETag.
+    """
+    version = key = None
+    if format == "json":
+        task = await task_service.get_task_status(task_id)
+        version = task_version(task) if task else None
+        key = request_key(request.url.path, request.query_params.multi_items())
+        entry = response_cache.get(task_id, version, key)
+        if entry is not None:
+            return cached_response(request, entry)
+
+    try:
+        query = OrderQuery(
+            sources=source,
+            categories=category,
+            countries=country,
+            date_from=date_from,
+            date_to=date_to,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            sort=parse_sort(sort),
+            fields=parse_fields(fields),
+        )
+
+        if limit is None and cursor is not None:
+            limit = DEFAULT_PAGE_SIZE
+
+        if format == "ndjson":
+            if not await task_service.has_task_data(task_id):
+                raise HTTPException(status_code=404, detail="No data found for task")
+            headers = {}
+            if limit is not None:
+                next_cursor = await task_service.next_page_cursor(task_id, query, limit, cursor)
+                if next_cursor:
+                    headers["X-Next-Cursor"] = next_cursor
+            return StreamingResponse(
+                task_service.stream_task_data(task_id, query, cursor=cursor, limit=limit),
+                media_type="application/x-ndjson",
+                headers=headers,
+            )
+        data, next_cursor = await task_service.get_task_data(
+            task_id, query, limit=limit, cursor=cursor
+        )
+    except InvalidOrderQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not data and not await task_service.has_task_data(task_id):
         raise HTTPException(status_code=404, detail="No data found for task")
-    return data 
\ No newline at end of file
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if FAST_JSON:
+        body = encode_rows(query.output_fields(), data)
+    elif query.fields:
+        # A projection does not match OrderResponse, so encode the rows directly
+        body = json.dumps(jsonable_encoder([query.project(row) for row in data])).encode()
+    else:
+        body = ORDER_LIST.dump_json(ORDER_LIST.validate_python(data, from_attributes=True))
+    if version is None:
+        return Response(body, media_type="application/json", headers=headers)
+    entry = response_cache.build(body, "application/json", headers)
+    response_cache.put(task_id, version, key, entry)
+    return cached_response(request, entry)
+
+@router.get("/tasks/{task_id}/stats", response_model=TaskStatsResponse)
+async def get_task_stats(
+    task_id: int,
+    top: int = Query(5, ge=1, le=100),
+    source: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    country: Optional[List[str]] = Query(None),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    task_service: TaskService = Depends(get_task_service),
+):
+    """Totals of a task's orders, narrowed by the same filters as ``/data``"""
+    query = OrderQuery(
+        sources=source, categories=category, countries=country, date_from=date_from, date_to=date_to
+    )
+    stats = await task_service.get_task_stats(task_id, top=top, query=query)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return stats
+
+@router.get("/tasks/{task_id}/timeseries", response_model=List[TimeSeriesPoint])
+async def get_task_timeseries(
+    task_id: int,
+    bucket: Literal["day", "week", "month"] = "day",
+    source: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    country: Optional[List[str]] = Query(None),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    task_service: TaskService = Depends(get_task_service),
+):
+    """Sales per period and source, narrowed by the same filters as ``/data``"""
+    query = OrderQuery(
+        sources=source, categories=category, countries=country, date_from=date_from, date_to=date_to
+    )
+    points = await task_service.get_task_timeseries(task_id, bucket=bucket, query=query)
+    if points is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return points
@@ -0,0 +1,126 @@
+"""Load-test the read endpoints of a running API and report latency percentiles.
+
+Start the server, then run from the backend directory:
+
+    python -m app.scripts.benchmark_api_latency --url http://localhost:8000 --concurrency 1 8 32
+
+Run it against two builds (e.g. before and after a change) with the same
+arguments to compare them. ``--ingest`` creates tasks right before each
+level so the processor is writing while the reads are measured.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+FINISHED_STATUSES = ("completed", "partially_completed")
+
+
+def create_task(url: str, title: str) -> int:
+    response = requests.post(f"{url}/api/tasks/", json={"title": title, "description": "load test"})
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def wait_for_task(url: str, task_id: int, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if requests.get(f"{url}/api/tasks/{task_id}").json()["status"] in FINISHED_STATUSES:
+            return
+        time.sleep(0.5)
+    raise TimeoutError(f"Task {task_id} did not finish within {timeout:.0f} seconds")
+
+
+def endpoints(task_id: int) -> List[str]:
+    """The request mix, cycled through by every client"""
+    return [
+        "/api/tasks/",
+        f"/api/tasks/{task_id}",
+        f"/api/tasks/{task_id}/data?limit=500",
+        f"/api/tasks/{task_id}/stats",
+        f"/api/tasks/{task_id}/timeseries?bucket=month",
+    ]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_level(url: str, paths: List[str], concurrency: int, num_requests: int) -> Dict:
+    """Issue ``num_requests`` requests from ``concurrency`` clients"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(num_requests))
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                ok = session.get(url + paths[i % len(paths)]).ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    wall = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / wall,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "mean": statistics.fmean(latencies) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--task-id", type=int, help="Finished task to read; one is created if omitted")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--ingest", type=int, default=0, help="Tasks to create before each level")
+    args = parser.parse_args()
+
+    url = args.url.rstrip("/")
+    task_id: Optional[int] = args.task_id
+    if task_id is None:
+        task_id = create_task(url, "latency benchmark")
+        print(f"Waiting for task {task_id} to finish...")
+        wait_for_task(url, task_id)
+    paths = endpoints(task_id)
+
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for concurrency in args.concurrency:
+        for i in range(args.ingest):
+            create_task(url, f"latency benchmark ingest {i}")
+        result = run_level(url, paths, concurrency, args.requests)
+        print(
+            f"{result['concurrency']:>8} {result['requests']:>9} {result['errors']:>7} "
+            f"{result['rps']:>9.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} {result['p99']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare the per-object ORM insert path with TaskProcessor's bulk insert path.
+
+Run from the backend directory:
+
+    python -m app.scripts.benchmark_bulk_insert --rows 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from ..database import build_async_engine, build_engine
+from ..models.models import Base, SourceOrder, Task, TaskStatus
+from ..services.task_processor import TaskProcessor, DEFAULT_INSERT_CHUNK_SIZE
+from .generate_sample_data import generate_random_order
+
+TEMPLATE_COUNT = 1000
+
+
+def build_templates(source: str) -> List[Dict]:
+    """Typed orders, shaped like the output of the source readers"""
+    templates = []
+    for i in range(TEMPLATE_COUNT):
+        order = generate_random_order(f"TEMPLATE_{i}", source)
+        order["order_date"] = datetime.fromisoformat(order["order_date"])
+        templates.append(order)
+    return templates
+
+
+def generate_rows(templates: List[Dict], num_rows: int) -> Iterator[Dict]:
+    """Yield ``num_rows`` orders without holding them all in memory"""
+    for i in range(num_rows):
+        yield dict(templates[i % len(templates)], order_id=f"BENCH_ORD_{i + 1:08d}")
+
+
+def make_session(path: str):
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    task = Task(title="benchmark", description="", status=TaskStatus.IN_PROGRESS)
+    session.add(task)
+    session.commit()
+    return engine, session, task.id
+
+
+def insert_per_object(session, task_id: int, rows: Iterator[Dict]) -> int:
+    """The original path: one ORM object per row and a single commit"""
+    count = 0
+    for row in rows:
+        session.add(SourceOrder(**row))
+        count += 1
+    session.commit()
+    return count
+
+
+def insert_bulk(path: str, task_id: int, rows: Iterator[Dict], chunk_size: int) -> int:
+    """TaskProcessor's path, through the async engine it runs on"""
+    async def insert() -> int:
+        engine = build_async_engine(f"sqlite:///{path}")
+        processor = TaskProcessor(insert_chunk_size=chunk_size)
+        try:
+            async with AsyncSession(engine) as session:
+                return await processor._insert_orders(session, task_id, rows)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(insert())
+
+
+def run(method: str, num_rows: int, templates: List[Dict], chunk_size: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.db")
+        engine, session, task_id = make_session(path)
+        rows = generate_rows(templates, num_rows)
+        started = time.perf_counter()
+        if method == "per_object":
+            inserted = insert_per_object(session, task_id, rows)
+        else:
+            inserted = insert_bulk(path, task_id, rows, chunk_size)
+        elapsed = time.perf_counter() - started
+        stored = session.execute(select(func.count(SourceOrder.id))).scalar()
+        assert inserted == stored == num_rows, (inserted, stored, num_rows)
+        session.close()
+        engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_INSERT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    templates = build_templates("source_a")
+    print(f"{'rows':>10} {'method':>10} {'seconds':>10} {'rows/sec':>12}")
+    for num_rows in args.rows:
+        timings = {}
+        for method in ("per_object", "bulk"):
+            elapsed = run(method, num_rows, templates, args.chunk_size)
+            timings[method] = elapsed
+            print(f"{num_rows:>10} {method:>10} {elapsed:>10.2f} {num_rows / elapsed:>12,.0f}")
+        print(f"{num_rows:>10} {'speedup':>10} {timings['per_object'] / timings['bulk']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Drive TaskProcessor end to end on generated sources and report ingest throughput.
+
+Run from the backend directory:
+
+    python -m app.scripts.benchmark_ingest --rows 100000 1000000 --tasks 4 --no-delay
+
+Each ``--rows`` level generates fresh source files, then ingests them in
+a new process against an empty SQLite database, so its peak RSS is its
+own. "child MB" is the largest parse worker.
+Stages are reported in seconds:
+
+- parse: converting both files to their columnar form
+- filter: waiting on the connectors, i.e. selecting and materializing rows
+- insert: writing orders and task links
+- commit: committing each chunk
+- rollups: building the per-task aggregates
+
+Filter, insert and commit are summed over tasks and sources, so with
+several workers they can add up to more than the wall time. Without
+``--no-delay`` the simulated source and processing delays are kept.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from ..database import build_async_engine, build_engine
+from ..models.models import Base, Task, TaskStatus
+from ..services.columnar_store import columnar_store
+from ..services.connectors import ConnectorRegistry, FileSourceConnector, SourceQuery
+from ..services.parse_pool import parse_pool
+from ..services.task_events import TaskEventBroker
+from ..services.task_processor import TaskProcessor
+from .generate_sample_data import DATE_RANGE_END, DATE_RANGE_START, generate_sources
+
+FINISHED_STATUSES = ("completed", "partially_completed")
+
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+async def wait_for_tasks(processor: TaskProcessor, events, task_ids: List[int], timeout: float):
+    """Wait until every task has published a finished status"""
+    pending = set(task_ids)
+    deadline = time.monotonic() + timeout
+    while pending:
+        event = await asyncio.wait_for(events.get(), timeout=max(0.0, deadline - time.monotonic()))
+        if event["type"] == "status" and event["status"] in FINISHED_STATUSES:
+            pending.discard(event["task_id"])
+
+
+async def run_ingest(
+    data_dir: str,
+    files: Dict,
+    num_tasks: int,
+    workers: int,
+    no_delay: bool,
+    categories: Optional[List[str]],
+    timeout: float,
+) -> Dict:
+    database_url = f"sqlite:///{os.path.join(data_dir, 'benchmark.db')}"
+    Base.metadata.create_all(bind=build_engine(database_url))
+    engine = build_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    registry = ConnectorRegistry()
+    for name, (path, _) in files.items():
+        registry.register(FileSourceConnector(name, path))
+    processor = TaskProcessor(
+        session_factory=session_factory,
+        num_workers=workers,
+        max_queue_size=max(num_tasks, 1),
+        # Progress events must not push the final statuses out of the queue
+        events=TaskEventBroker(queue_size=100_000),
+        connectors=registry,
+        simulate_delays=not no_delay,
+    )
+
+    try:
+        # Parse ahead of the tasks so the filter stage only reads the columns
+        started = time.perf_counter()
+        await asyncio.gather(*(registry.get(name)._select(SourceQuery()) for name in files))
+        parse_seconds = time.perf_counter() - started
+
+        filters = {"categories": categories} if categories else None
+        async with session_factory() as db:
+            tasks = [
+                Task(
+                    title=f"ingest benchmark {i}",
+                    description="",
+                    status=TaskStatus.PENDING,
+                    created_at=datetime.utcnow(),
+                    date_from=DATE_RANGE_START,
+                    date_to=DATE_RANGE_END,
+                    connectors=[{"name": name, "filters": filters} for name in files],
+                )
+                for i in range(num_tasks)
+            ]
+            db.add_all(tasks)
+            await db.commit()
+            task_ids = [task.id for task in tasks]
+
+        events = processor.events.subscribe()
+        started = time.perf_counter()
+        # Queued before the workers start, like tasks created through the API
+        for task_id in task_ids:
+            await processor.add_task(task_id)
+        await processor.start()
+        await wait_for_tasks(processor, events, task_ids, timeout)
+        wall = time.perf_counter() - started
+        await processor.stop_processing()
+    finally:
+        await engine.dispose()
+        # Reap the parse workers so their peak RSS is counted below
+        parse_pool.shutdown(wait=True)
+
+    return {
+        "parse": parse_seconds,
+        "wall": wall,
+        "orders": processor.orders_linked,
+        "stored": processor.orders_stored,
+        "synced": processor.orders_synced,
+        "stages": dict(processor.stage_seconds),
+    }
+
+
+def run_level(data_dir: str, files: Dict, args: argparse.Namespace) -> Dict:
+    """Ingest one level's files; meant to run in its own process"""
+    columnar_store.root = os.path.join(data_dir, "columnar")
+    if args.parse_workers is not None:
+        parse_pool.max_workers = args.parse_workers
+    result = asyncio.run(run_ingest(
+        data_dir, files, args.tasks, args.workers, args.no_delay, args.categories, args.timeout
+    ))
+    result["rss"] = peak_rss_mb(resource.RUSAGE_SELF)
+    result["children_rss"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000], help="Orders per source, per level")
+    parser.add_argument("--tasks", type=int, default=4, help="Tasks to ingest per level")
+    parser.add_argument("--workers", type=int, default=4, help="Processor workers")
+    parser.add_argument("--parse-workers", type=int, help="Parse pool processes (default: PARSE_WORKERS)")
+    parser.add_argument("--generate-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--categories", nargs="+", help="Category filter for every task")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds to wait for the tasks of a level")
+    parser.add_argument("--no-delay", action="store_true", help="Disable the simulated delays")
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>10} {'file MB':>8} {'orders':>10} {'wall s':>8} {'rows/s':>10} {'parse s':>8} "
+        f"{'filter s':>9} {'insert s':>9} {'commit s':>9} {'sync s':>9} {'link s':>9} {'rollup s':>9} "
+        f"{'RSS MB':>8} {'child MB':>9}"
+    )
+    for rows in args.rows:
+        data_dir = tempfile.mkdtemp(prefix="benchmark-ingest-")
+        try:
+            files = generate_sources(data_dir, rows, rows, args.seed, workers=args.generate_workers)
+            # A fresh process per level keeps peak RSS figures independent
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(run_level, data_dir, files, args).result()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        file_mb = sum(size for _, size in files.values()) / 1e6
+        stages = result["stages"]
+        print(
+            f"{rows:>10} {file_mb:>8.1f} {result['orders']:>10} {result['wall']:>8.2f} "
+            f"{result['orders'] / result['wall']:>10.0f} {result['parse']:>8.2f} {stages['fetch']:>9.2f} "
+            f"{stages['insert']:>9.2f} {stages['commit']:>9.2f} {stages['sync']:>9.2f} {stages['link']:>9.2f} "
+            f"{stages['rollups']:>9.2f} "
+            f"{result['rss']:>8.0f} {result['children_rss']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
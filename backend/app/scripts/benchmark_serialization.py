@@ -0,0 +1,131 @@
+"""Compare the ways GET /api/tasks/{id}/data can serialize a task's orders.
+
+Run from the backend directory:
+
+    python -m app.scripts.benchmark_serialization --rows 100000
+
+Every method reads the same plain rows through TaskService, then:
+
+- response_model: validates them into OrderResponse models and encodes
+  those with json.dumps, as FastAPI does for a declared response_model
+- type_adapter: validates them and encodes the models with pydantic-core
+- orjson: encodes the rows directly with orjson (the FAST_JSON path)
+
+Latency is the best of ``--repeat`` runs. Peak memory is measured with
+tracemalloc in a separate run, since tracing slows everything down.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import build_async_engine
+from ..routes.task_routes import ORDER_LIST
+from ..services.order_query import OrderQuery
+from ..services.task_processor import TaskProcessor
+from ..services.task_service import TaskService, encode_rows
+from .benchmark_bulk_insert import build_templates, generate_rows, make_session
+
+
+def encode_response_model(rows: List) -> bytes:
+    models = ORDER_LIST.validate_python(rows, from_attributes=True)
+    return json.dumps(ORDER_LIST.dump_python(models, mode="json")).encode()
+
+
+def encode_type_adapter(rows: List) -> bytes:
+    return ORDER_LIST.dump_json(ORDER_LIST.validate_python(rows, from_attributes=True))
+
+
+def encode_orjson(rows: List) -> bytes:
+    return encode_rows(OrderQuery().output_fields(), rows)
+
+
+METHODS: Dict[str, Callable[[List], bytes]] = {
+    "response_model": encode_response_model,
+    "type_adapter": encode_type_adapter,
+    "orjson": encode_orjson,
+}
+
+
+async def fetch_and_encode(engine, task_id: int, encode: Callable[[List], bytes]) -> Dict:
+    async with AsyncSession(engine) as session:
+        started = time.perf_counter()
+        rows, _ = await TaskService(session, processor=None).get_task_data(task_id)
+        fetched = time.perf_counter()
+        body = encode(rows)
+        encoded = time.perf_counter()
+    return {"fetch": fetched - started, "encode": encoded - fetched, "bytes": len(body), "rows": len(rows)}
+
+
+async def measure(path: str, task_id: int, method: str, repeat: int) -> Dict:
+    engine = build_async_engine(f"sqlite:///{path}")
+    try:
+        encode = METHODS[method]
+        runs = [await fetch_and_encode(engine, task_id, encode) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run["fetch"] + run["encode"])
+
+        tracemalloc.start()
+        try:
+            await fetch_and_encode(engine, task_id, encode)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        await engine.dispose()
+    return {**best, "peak": peak}
+
+
+def load_orders(path: str, num_rows: int) -> int:
+    """A database holding one task with ``num_rows`` orders"""
+    engine, session, task_id = make_session(path)
+    session.close()
+    engine.dispose()
+
+    async def insert():
+        async_engine = build_async_engine(f"sqlite:///{path}")
+        try:
+            async with AsyncSession(async_engine) as db:
+                rows = generate_rows(build_templates("source_a"), num_rows)
+                await TaskProcessor()._insert_orders(db, task_id, rows)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(insert())
+    return task_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>10} {'method':>15} {'fetch s':>8} {'encode s':>9} {'total s':>8} "
+        f"{'speedup':>8} {'peak MB':>8} {'body MB':>8}"
+    )
+    for num_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "benchmark.db")
+            task_id = load_orders(path, num_rows)
+            baseline = None
+            for method in METHODS:
+                result = asyncio.run(measure(path, task_id, method, args.repeat))
+                assert result["rows"] == num_rows, result
+                total = result["fetch"] + result["encode"]
+                baseline = baseline or total
+                print(
+                    f"{num_rows:>10} {method:>15} {result['fetch']:>8.3f} {result['encode']:>9.3f} "
+                    f"{total:>8.3f} {baseline / total:>7.1f}x {result['peak'] / 1e6:>8.1f} "
+                    f"{result['bytes'] / 1e6:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare the row-by-row source filter loop with the columnar SourceIndex.
+
+Run from the backend directory:
+
+    python -m app.scripts.benchmark_source_filter --rows 100000 1000000
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Callable
+
+from ..services.source_index import SourceIndex
+from ..services.source_readers import filter_orders
+from .benchmark_bulk_insert import build_templates, generate_rows
+
+DATE_FROM = datetime(2018, 1, 1)
+DATE_TO = datetime(2019, 12, 31, 23, 59, 59)
+CATEGORIES = ["Electronics", "Books", "Automotive"]
+
+
+def timed(func: Callable, repeat: int):
+    """Best of ``repeat`` runs, with the result of the last run"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    templates = build_templates("source_a")
+    print(f"{'rows':>10} {'method':>22} {'seconds':>10} {'matches':>10}")
+    for num_rows in args.rows:
+        orders = list(generate_rows(templates, num_rows))
+
+        build, index = timed(lambda: SourceIndex.from_orders(orders), 1)
+        loop, expected = timed(
+            lambda: list(filter_orders(orders, DATE_FROM, DATE_TO, CATEGORIES)), args.repeat
+        )
+        select, positions = timed(lambda: index.select(DATE_FROM, DATE_TO, CATEGORIES), args.repeat)
+        rows, selected = timed(lambda: list(index.rows(positions)), args.repeat)
+        assert len(selected) == len(expected) == len(positions)
+
+        print(f"{num_rows:>10} {'index build (once)':>22} {build:>10.4f} {len(index):>10}")
+        print(f"{num_rows:>10} {'python loop':>22} {loop:>10.4f} {len(expected):>10}")
+        print(f"{num_rows:>10} {'index select':>22} {select:>10.4f} {len(positions):>10}")
+        print(f"{num_rows:>10} {'index select + rows':>22} {select + rows:>10.4f} {len(selected):>10}")
+        print(f"{num_rows:>10} {'select speedup':>22} {loop / select:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Convert the source files to the memory-mapped columnar format used by the processor.
+
+Run from the backend directory:
+
+    python -m app.scripts.convert_sources
+
+The processor converts a file by itself the first time it is read after
+a change; this script does it ahead of time and compares the result with
+parsing the raw file. ``--force`` converts files that are up to date.
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from functools import partial
+
+from ..services.columnar_store import META_FILE, columnar_store
+from ..services.parse_pool import parse_pool
+from ..services.source_readers import SOURCE_FILES
+
+DATE_FROM = datetime(2020, 1, 1)
+DATE_TO = datetime(2021, 12, 31, 23, 59, 59)
+CATEGORIES = ["Electronics", "Books"]
+
+
+def directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", choices=sorted(SOURCE_FILES), nargs="+", default=sorted(SOURCE_FILES))
+    parser.add_argument("--force", action="store_true", help="Convert files that are up to date")
+    args = parser.parse_args()
+
+    print(f"{'source':>10} {'raw MB':>8} {'disk MB':>8} {'rows':>9} {'parse s':>8} {'convert s':>10} {'open ms':>8} {'select ms':>10}")
+    try:
+        for source in args.source:
+            path = SOURCE_FILES[source]
+            build = partial(parse_pool.build_index, source=source)
+
+            started = time.perf_counter()
+            build(path)
+            parse_seconds = time.perf_counter() - started
+
+            directory = columnar_store.directory_for(path, source)
+            convert_seconds = 0.0
+            if args.force or not os.path.exists(os.path.join(directory, META_FILE)):
+                started = time.perf_counter()
+                columnar_store.convert(path, source, build, directory)
+                convert_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            index = columnar_store.get_index(path, source, build)
+            open_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            rows = list(index.rows(index.select(DATE_FROM, DATE_TO, CATEGORIES)))
+            select_ms = (time.perf_counter() - started) * 1000
+
+            print(
+                f"{source:>10} {os.path.getsize(path) / 1e6:>8.2f} {directory_size(directory) / 1e6:>8.2f} "
+                f"{len(index):>9} {parse_seconds:>8.2f} {convert_seconds:>10.2f} {open_ms:>8.1f} "
+                f"{select_ms:>10.1f}  ({len(rows)} selected)"
+            )
+    finally:
+        parse_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,29 @@
+"""Generate the sample source files.
+
+Run from the backend directory:
+
+    python -m app.scripts.generate_sample_data --rows 200
+    python -m app.scripts.generate_sample_data --rows 10000000 --output-dir /tmp/orders
+
+Orders are generated with numpy in chunks of ``--chunk-rows``, on
+``--workers`` processes, and written out as they complete, so memory use
+does not grow with ``--rows``. Each chunk is seeded from ``--seed`` and its
+position, so the same arguments always produce the same files, whatever
+the number of workers.
+"""
+import argparse
 import json
 import csv
+import multiprocessing
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict, Tuple
 import os
 
+import numpy as np
+
 # Sample data for generating realistic orders
 PRODUCT_CATEGORIES = [
     "Electronics",
@@ -32,6 +51,8 @@ PRODUCTS = {
     "Automotive": ["Car Accessories", "Tools", "Cleaning Supplies", "Parts", "Electronics", "Maintenance", "Safety Equipment", "Interior Accessories", "Exterior Accessories", "Performance Parts"]
 }
 
+PRODUCT_SOURCES = ["source_a", "source_b"]
+
 COUNTRIES = [
     "United States", "United Kingdom", "Canada", "Australia", "Germany",
     "France", "Japan", "Spain", "Italy", "Brazil", "India", "China",
@@ -41,6 +62,14 @@ COUNTRIES = [
     "Hungary", "Israel", "South Africa", "UAE", "Saudi Arabia", "Turkey"
 ]
 
+DATE_RANGE_START = datetime(2015, 1, 1)
+DATE_RANGE_END = datetime(2025, 3, 30)
+CSV_FIELDS = [
+    "order_id", "order_date", "source", "product_name", "product_category", "quantity",
+    "unit_price", "total_amount", "customer_id", "customer_country", "source_specific_data",
+]
+DEFAULT_CHUNK_ROWS = 100_000
+
 def generate_random_date(start_date: datetime, end_date: datetime) -> datetime:
     time_between = end_date - start_date
     days_between = time_between.days
@@ -102,45 +131,187 @@ def generate_random_order(order_id: str, source: str) -> Dict:
         "source_specific_data": json.dumps(source_specific)
     }
 
-def generate_orders(num_orders: int, source: str) -> List[Dict]:
-    orders = []
-    for i in range(num_orders):
-        order_id = f"{source.upper()}_ORD_{i+1:04d}"
-        orders.append(generate_random_order(order_id, source))
-    return orders
+def _choice(rng: np.random.Generator, values: List, size: int) -> np.ndarray:
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+SOURCE_SPECIFIC_TEMPLATES = {
+    "source_a": (
+        '{{"shop_name": "Shop_{}", "shop_rating": {}, "shop_location": "{}", "shipping_method": "{}", '
+        '"payment_method": "{}", "customer_review": {}, "discount_applied": {}, "loyalty_points": {}}}'
+    ),
+    "source_b": (
+        '{{"store_id": "STORE_{}", "store_type": "{}", "store_region": "{}", "delivery_type": "{}", '
+        '"payment_type": "{}", "membership_level": "{}", "reward_points": {}, "special_offer": {}}}'
+    ),
+}
+
+def _source_specific_json(rng: np.random.Generator, source: str, size: int) -> List[str]:
+    """The source_specific_data strings of a chunk, formatted like json.dumps output"""
+    boolean = np.array(["false", "true"], dtype=object)
+    if source == "source_a":
+        columns = [
+            rng.integers(1, 101, size),
+            np.round(rng.uniform(1, 5, size), 1),
+            _choice(rng, COUNTRIES, size),
+            _choice(rng, ["Standard", "Express", "Next Day"], size),
+            _choice(rng, ["Credit Card", "PayPal", "Bank Transfer"], size),
+            boolean[rng.integers(0, 2, size)],
+            np.round(rng.uniform(0, 0.3, size), 2),
+            rng.integers(0, 1001, size),
+        ]
+    else:
+        columns = [
+            rng.integers(1, 51, size),
+            _choice(rng, ["Retail", "Wholesale", "Outlet"], size),
+            _choice(rng, ["North", "South", "East", "West"], size),
+            _choice(rng, ["Standard", "Premium", "Same Day"], size),
+            _choice(rng, ["Card", "Digital Wallet", "Store Credit"], size),
+            _choice(rng, ["Basic", "Silver", "Gold", "Platinum"], size),
+            rng.integers(0, 2001, size),
+            boolean[rng.integers(0, 2, size)],
+        ]
+    template = SOURCE_SPECIFIC_TEMPLATES[source].format
+    return [template(*values) for values in zip(*(column.tolist() for column in columns))]
+
+def generate_order_columns(source: str, start: int, count: int, seed: int) -> Dict[str, List]:
+    """Orders ``start`` to ``start + count`` of a source as columns of values.
+
+    The values follow the distributions of generate_random_order. The chunk
+    is seeded from ``seed``, the source and ``start``, so it does not
+    depend on how the rows are split between processes.
+    """
+    rng = np.random.default_rng([seed, PRODUCT_SOURCES.index(source), start])
+    category_codes = rng.integers(0, len(PRODUCT_CATEGORIES), count)
+    product_codes = rng.integers(0, 10, count)
+    products = np.asarray([PRODUCTS[c] for c in PRODUCT_CATEGORIES], dtype=object)
+    quantity = rng.integers(1, 6, count)
+    unit_price = np.round(rng.uniform(10, 1000, count), 2)
+    total_amount = np.round(quantity * unit_price, 2)
+    seconds = rng.integers(0, int((DATE_RANGE_END - DATE_RANGE_START).total_seconds()), count)
+    order_dates = np.datetime64(DATE_RANGE_START, "s") + seconds.astype("timedelta64[s]")
+    return {
+        "order_id": [f"{source.upper()}_ORD_{i:04d}" for i in range(start + 1, start + count + 1)],
+        "order_date": np.datetime_as_string(order_dates, unit="s").tolist(),
+        "source": [source] * count,
+        "product_name": products[category_codes, product_codes].tolist(),
+        "product_category": np.asarray(PRODUCT_CATEGORIES, dtype=object)[category_codes].tolist(),
+        "quantity": quantity.tolist(),
+        "unit_price": unit_price.tolist(),
+        "total_amount": total_amount.tolist(),
+        "customer_id": ("CUST_" + rng.integers(1000, 10000, count).astype(str).astype(object)).tolist(),
+        "customer_country": _choice(rng, COUNTRIES, count).tolist(),
+        "source_specific_data": _source_specific_json(rng, source, count),
+    }
+
+JSON_ITEM_TEMPLATE = (
+    '  {{"order_id": "{}", "order_date": "{}", "source": "{}", "product_name": "{}", '
+    '"product_category": "{}", "quantity": {}, "unit_price": {}, "total_amount": {}, '
+    '"customer_id": "{}", "customer_country": "{}", "source_specific_data": {}}},\n'
+)
+
+def render_json_chunk(source: str, start: int, count: int, seed: int) -> str:
+    """Items of a JSON array, one per line, each followed by a comma"""
+    columns = generate_order_columns(source, start, count, seed)
+    # Only source_specific_data holds characters that need escaping
+    columns["source_specific_data"] = [json.dumps(value) for value in columns["source_specific_data"]]
+    template = JSON_ITEM_TEMPLATE.format
+    return "".join(template(*values) for values in zip(*(columns[name] for name in CSV_FIELDS)))
+
+CSV_ROW_TEMPLATE = "{},{},{},{},{},{},{},{},{},{},{}\n"
 
-def save_to_json(orders: List[Dict], filename: str):
-    with open(filename, 'w') as f:
-        json.dump(orders, f, indent=2)
+def render_csv_chunk(source: str, start: int, count: int, seed: int) -> str:
+    """CSV rows without a header, quoted as csv.writer would"""
+    columns = generate_order_columns(source, start, count, seed)
+    # Generated names contain no delimiters; only source_specific_data needs quoting
+    columns["source_specific_data"] = [
+        '"' + value.replace('"', '""') + '"' for value in columns["source_specific_data"]
+    ]
+    template = CSV_ROW_TEMPLATE.format
+    return "".join(template(*values) for values in zip(*(columns[name] for name in CSV_FIELDS)))
 
-def save_to_csv(orders: List[Dict], filename: str):
-    if not orders:
+def iter_chunks(
+    render: Callable[[str, int, int, int], str],
+    source: str,
+    num_orders: int,
+    seed: int,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+) -> Iterator[str]:
+    """Rendered chunks in order, at most two per worker in flight"""
+    ranges = [(start, min(chunk_rows, num_orders - start)) for start in range(0, num_orders, chunk_rows)]
+    if workers <= 1:
+        for start, count in ranges:
+            yield render(source, start, count, seed)
         return
-    
-    fieldnames = orders[0].keys()
-    with open(filename, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(orders)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = deque()
+        for start, count in ranges:
+            pending.append(executor.submit(render, source, start, count, seed))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
-def main():
-    # Create data directory if it doesn't exist
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-    os.makedirs(data_dir, exist_ok=True)
+def write_json_source(filename: str, source: str, num_orders: int, seed: int, **options) -> int:
+    """Stream ``num_orders`` generated orders into a JSON array file; returns bytes written"""
+    with open(filename, "w") as f:
+        f.write("[\n")
+        pending = ""
+        for chunk in iter_chunks(render_json_chunk, source, num_orders, seed, **options):
+            f.write(pending)
+            pending = chunk
+        # The last item takes no trailing comma
+        f.write(pending[:-2] + "\n" if pending else "")
+        f.write("]\n")
+        return f.tell()
 
-    # Generate orders for both sources
-    source_a_orders = generate_orders(200, "source_a")
-    source_b_orders = generate_orders(200, "source_b")
+def write_csv_source(filename: str, source: str, num_orders: int, seed: int, **options) -> int:
+    """Stream ``num_orders`` generated orders into a CSV file; returns bytes written"""
+    with open(filename, "w", newline="") as f:
+        csv.writer(f, lineterminator="\n").writerow(CSV_FIELDS)
+        for chunk in iter_chunks(render_csv_chunk, source, num_orders, seed, **options):
+            f.write(chunk)
+        return f.tell()
 
-    # Save source A orders to JSON
-    source_a_json = os.path.join(data_dir, "source_a_orders.json")
-    save_to_json(source_a_orders, source_a_json)
-    print(f"Generated {len(source_a_orders)} orders for source A in {source_a_json}")
+def generate_sources(
+    output_dir: str,
+    rows_a: int,
+    rows_b: int,
+    seed: int = 42,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+) -> Dict[str, Tuple[str, int]]:
+    """Write both source files into ``output_dir``; returns their paths and sizes"""
+    os.makedirs(output_dir, exist_ok=True)
+    source_a_json = os.path.join(output_dir, "source_a_orders.json")
+    source_b_csv = os.path.join(output_dir, "source_b_orders.csv")
+    options = {"chunk_rows": chunk_rows, "workers": workers}
+    return {
+        "source_a": (source_a_json, write_json_source(source_a_json, "source_a", rows_a, seed, **options)),
+        "source_b": (source_b_csv, write_csv_source(source_b_csv, "source_b", rows_b, seed, **options)),
+    }
 
-    # Save source B orders to CSV
-    source_b_csv = os.path.join(data_dir, "source_b_orders.csv")
-    save_to_csv(source_b_orders, source_b_csv)
-    print(f"Generated {len(source_b_orders)} orders for source B in {source_b_csv}")
+def main():
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200, help="Orders per source")
+    parser.add_argument("--rows-a", type=int, help="Orders for source A, overriding --rows")
+    parser.add_argument("--rows-b", type=int, help="Orders for source B, overriding --rows")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--output-dir", default=data_dir)
+    args = parser.parse_args()
+
+    rows = {
+        "source_a": args.rows if args.rows_a is None else args.rows_a,
+        "source_b": args.rows if args.rows_b is None else args.rows_b,
+    }
+    files = generate_sources(
+        args.output_dir, rows["source_a"], rows["source_b"], args.seed, args.chunk_rows, args.workers
+    )
+    for source, (path, size) in files.items():
+        print(f"Generated {rows[source]} orders for {source} in {path} ({size / 1e6:.1f} MB)")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Serve a source file as a paginated HTTP order API, for exercising HttpSourceConnector.
+
+Run from the backend directory:
+
+    python -m app.scripts.mock_source_server --port 8001 --latency 0.2 --failure-rate 0.1
+
+then start the API with ``MOCK_SOURCE_URL=http://localhost:8001`` and create
+tasks with ``"connectors": [{"name": "mock_http"}]``. ``--failure-rate``
+answers that share of requests with a 503 so retries can be observed.
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+
+from ..services.source_readers import SOURCE_FILES, SOURCE_READERS, filter_orders
+
+
+def create_app(source: str, latency: float = 0.0, failure_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Mock order source")
+    orders: List[Dict] = []
+
+    @app.on_event("startup")
+    def load_orders():
+        orders.extend(SOURCE_READERS[source](SOURCE_FILES[source]))
+
+    @app.get("/orders")
+    async def get_orders(
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        category: Optional[List[str]] = Query(None),
+        cursor: int = Query(0, ge=0),
+        limit: int = Query(1000, ge=1, le=10000),
+    ):
+        await asyncio.sleep(latency)
+        if random.random() < failure_rate:
+            raise HTTPException(status_code=503, detail="Simulated outage")
+        matches = list(filter_orders(orders, date_from, date_to, category))
+        page = matches[cursor:cursor + limit]
+        next_cursor = cursor + limit if cursor + limit < len(matches) else None
+        return {"orders": jsonable_encoder(page), "next_cursor": next_cursor}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", choices=sorted(SOURCE_FILES), default="source_b", help="File to serve")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every request")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.source, args.latency, args.failure_rate), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .source_index import SourceIndex, StringColumn
+from .source_readers import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_CACHE_ENABLED = os.getenv("COLUMNAR_CACHE", "true").lower() in ("1", "true", "yes")
+DEFAULT_COLUMNAR_DIR = os.getenv("COLUMNAR_CACHE_DIR", os.path.join(DATA_DIR, "columnar"))
+
+# Bumped whenever the on-disk layout changes, so old conversions are redone
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+
+def write_index(index: SourceIndex, directory: str):
+    """Write an index as one ``.npy`` file per column plus a metadata file.
+
+    Numeric, date and dictionary-code columns are saved as they are. Other
+    string columns become a UTF-8 buffer with offsets. Dictionaries are
+    small and go into the metadata.
+    """
+    os.makedirs(directory, exist_ok=True)
+    kinds = {}
+    for name, column in index.columns.items():
+        if isinstance(column, np.ndarray) and column.dtype == object:
+            column = StringColumn.from_values(column.tolist())
+        if isinstance(column, StringColumn):
+            np.save(os.path.join(directory, f"{name}.offsets.npy"), column.offsets)
+            np.save(os.path.join(directory, f"{name}.data.npy"), column.data)
+            if column.valid is not None:
+                np.save(os.path.join(directory, f"{name}.valid.npy"), column.valid)
+            kinds[name] = "string"
+        else:
+            np.save(os.path.join(directory, f"{name}.npy"), column)
+            kinds[name] = "array"
+    meta = {
+        "version": FORMAT_VERSION,
+        "rows": len(index),
+        "columns": kinds,
+        "dictionaries": {name: values.tolist() for name, values in index.dictionaries.items()},
+    }
+    with open(os.path.join(directory, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+
+def read_index(directory: str) -> SourceIndex:
+    """Memory-map an index written by ``write_index``; no column is copied into memory"""
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+
+    def load(name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, name), mmap_mode="r")
+
+    columns = {}
+    for name, kind in meta["columns"].items():
+        if kind == "string":
+            valid_file = f"{name}.valid.npy"
+            valid = load(valid_file) if os.path.exists(os.path.join(directory, valid_file)) else None
+            columns[name] = StringColumn(load(f"{name}.offsets.npy"), load(f"{name}.data.npy"), valid)
+        else:
+            columns[name] = load(f"{name}.npy")
+    dictionaries = {name: np.asarray(values, dtype=object) for name, values in meta["dictionaries"].items()}
+    return SourceIndex(columns, dictionaries)
+
+
+@dataclass
+class StoreEntry:
+    directory: str
+    index: SourceIndex
+
+
+class ColumnarStore:
+    """Source files converted to memory-mapped columnar indexes on disk.
+
+    Each conversion lives in a directory named after the source file's
+    size and mtime. A changed file therefore maps to a directory that does
+    not exist yet, and it is converted again on its next use. Readers map
+    the columns instead of parsing. A task's filters then only touch the
+    pages of ``order_date`` inside its date range and the category codes
+    of those rows, plus the values of the rows selected.
+    """
+
+    def __init__(self, root: str = DEFAULT_COLUMNAR_DIR):
+        self.root = root
+        self._loaded: Dict[str, StoreEntry] = {}
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.conversions = 0
+        self.conversion_seconds = 0.0
+
+    def _prefix(self, path: str, source: str) -> str:
+        """Start of the directory names of every conversion of ``path``"""
+        digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+        return f"{source}-{digest}-"
+
+    def directory_for(self, path: str, source: str) -> str:
+        stat = os.stat(path)
+        name = f"{self._prefix(path, source)}v{FORMAT_VERSION}-{stat.st_size}-{stat.st_mtime_ns}"
+        return os.path.join(self.root, name)
+
+    def get_index(self, path: str, source: str, build: Callable[[str], SourceIndex]) -> SourceIndex:
+        """Memory-mapped index of ``path``, converting the file first if it changed"""
+        directory = self.directory_for(path, source)
+        with self._lock:
+            entry = self._loaded.get(path)
+            if entry and entry.directory == directory:
+                self.hits += 1
+                return entry.index
+            build_lock = self._build_locks.setdefault(path, threading.Lock())
+
+        # One conversion per file at a time; others wait and then load it
+        with build_lock:
+            if not os.path.exists(os.path.join(directory, META_FILE)):
+                self.convert(path, source, build, directory)
+            index = read_index(directory)
+        with self._lock:
+            self.loads += 1
+            self._loaded[path] = StoreEntry(directory, index)
+        return index
+
+    def convert(
+        self, path: str, source: str, build: Callable[[str], SourceIndex], directory: Optional[str] = None
+    ) -> str:
+        """Parse ``path`` and write its columnar form; returns the directory written"""
+        directory = directory or self.directory_for(path, source)
+        started = time.perf_counter()
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{source}-", dir=self.root)
+        try:
+            write_index(build(path), staging)
+            try:
+                # Other processes see either no directory or a complete one
+                os.rename(staging, directory)
+            except OSError:
+                if not os.path.exists(os.path.join(directory, META_FILE)):
+                    raise
+                # Converted concurrently by another process
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._remove_stale(self._prefix(path, source), keep=directory)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.conversions += 1
+            self.conversion_seconds += elapsed
+        logger.info("Converted %s to columnar form in %.2fs", path, elapsed)
+        return directory
+
+    def _remove_stale(self, prefix: str, keep: str):
+        """Delete earlier conversions of a file; open memory maps stay valid"""
+        for name in os.listdir(self.root):
+            candidate = os.path.join(self.root, name)
+            if name.startswith(prefix) and candidate != keep:
+                shutil.rmtree(candidate, ignore_errors=True)
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": COLUMNAR_CACHE_ENABLED,
+                "hits": self.hits,
+                "loads": self.loads,
+                "conversions": self.conversions,
+                "conversion_seconds": self.conversion_seconds,
+                "sources": len(self._loaded),
+            }
+
+
+columnar_store = ColumnarStore()
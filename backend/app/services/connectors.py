@@ -0,0 +1,363 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import httpx
+
+from .columnar_store import COLUMNAR_CACHE_ENABLED, columnar_store
+from .metrics import SOURCE_BYTES_READ, SOURCE_ROWS_READ, SOURCE_STAGE_SECONDS, StageTimer
+from .parse_pool import parse_pool
+from .source_cache import source_cache
+from .source_readers import SOURCE_FILES, SOURCE_READERS, filter_orders, parse_order
+
+logger = logging.getLogger(__name__)
+
+# Defaults for every connector, overridable per connector
+DEFAULT_CONNECTOR_CONCURRENCY = int(os.getenv("CONNECTOR_MAX_CONCURRENCY", "4"))
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("CONNECTOR_REQUEST_TIMEOUT", "10"))
+DEFAULT_MAX_RETRIES = int(os.getenv("CONNECTOR_MAX_RETRIES", "3"))
+DEFAULT_RETRY_BACKOFF = float(os.getenv("CONNECTOR_RETRY_BACKOFF", "0.5"))
+DEFAULT_BATCH_SIZE = int(os.getenv("INSERT_CHUNK_SIZE", "5000"))
+DEFAULT_PAGE_SIZE = int(os.getenv("CONNECTOR_PAGE_SIZE", "1000"))
+
+# Set to false to drop the simulated source latency, e.g. for benchmarks
+SIMULATE_DELAYS = os.getenv("SIMULATE_DELAYS", "true").lower() in ("1", "true", "yes")
+
+# Base URL of the mock HTTP source (python -m app.scripts.mock_source_server)
+MOCK_SOURCE_URL = os.getenv("MOCK_SOURCE_URL")
+
+# Connectors used by tasks created with the source_a/source_b flags
+LEGACY_CONNECTORS = ("source_a", "source_b")
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most ``size`` items"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def categories_from_filters(filters: Any) -> List[str]:
+    """Category filter of a connector, whose filters may be stored as a JSON string"""
+    if isinstance(filters, str):
+        try:
+            filters = json.loads(filters)
+        except json.JSONDecodeError:
+            logger.warning("Invalid JSON in connector filters: %s", filters)
+            filters = {}
+    return filters.get("categories", []) if filters else []
+
+
+class ConnectorError(Exception):
+    """Raised when a connector fails permanently"""
+
+
+class TransientConnectorError(ConnectorError):
+    """Raised for failures worth retrying, such as timeouts and 5xx responses"""
+
+
+class UnknownConnectorError(ValueError):
+    """Raised when a task names a connector that is not registered"""
+
+
+@dataclass
+class SourceQuery:
+    """What a task asks of a connector"""
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    categories: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Page:
+    """One page of a paginated source; ``next_cursor`` is None on the last page"""
+    orders: List[Dict]
+    next_cursor: Optional[Any] = None
+
+
+@dataclass
+class ConnectorStats:
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    orders: int = 0
+    active: int = 0
+
+
+class SourceConnector:
+    """A source of orders, yielding typed order batches asynchronously.
+
+    Paginated sources implement ``fetch_page``; ``fetch`` then walks the
+    pages, retrying each one with backoff and bounding it with a timeout.
+    Streamed sources override ``fetch`` and wrap fallible calls in
+    ``call``. ``stream`` is what the processor consumes: it holds one of
+    the connector's ``max_concurrency`` slots for as long as a task reads.
+    """
+
+    name: str = ""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_CONNECTOR_CONCURRENCY,
+        request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self.stats = ConnectorStats()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        # Whether to simulate remote latency; set by the registry (see set_simulate_delays)
+        self.simulate_delays = SIMULATE_DELAYS
+
+    async def stream(self, query: SourceQuery) -> AsyncIterator[List[Dict]]:
+        """Order batches for ``query``, within the connector's concurrency limit"""
+        async with self._slots:
+            self.stats.active += 1
+            try:
+                async for batch in self.fetch(query):
+                    self.stats.orders += len(batch)
+                    SOURCE_ROWS_READ.inc(len(batch), source=self.name)
+                    yield batch
+            except Exception:
+                self.stats.failures += 1
+                raise
+            finally:
+                self.stats.active -= 1
+
+    async def fetch(self, query: SourceQuery) -> AsyncIterator[List[Dict]]:
+        cursor = None
+        while True:
+            page = await self.call(self.fetch_page, query, cursor)
+            if page.orders:
+                yield page.orders
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    async def fetch_page(self, query: SourceQuery, cursor: Optional[Any]) -> Page:
+        raise NotImplementedError
+
+    async def call(self, func, *args):
+        """Await ``func(*args)`` under the request timeout, retrying transient failures"""
+        for attempt in range(self.max_retries + 1):
+            self.stats.requests += 1
+            try:
+                return await asyncio.wait_for(func(*args), timeout=self.request_timeout)
+            except (asyncio.TimeoutError, TransientConnectorError) as e:
+                if attempt == self.max_retries:
+                    raise ConnectorError(
+                        f"{self.name} failed after {attempt + 1} attempts: {e or type(e).__name__}"
+                    ) from e
+                # Exponential backoff with jitter so retries do not line up
+                delay = self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                self.stats.retries += 1
+                logger.warning("%s request failed (%s), retrying in %.2fs", self.name, e or type(e).__name__, delay)
+                await asyncio.sleep(delay)
+
+    def get_metrics(self) -> Dict:
+        return {
+            "type": type(self).__name__,
+            "max_concurrency": self.max_concurrency,
+            **vars(self.stats),
+        }
+
+
+class FileSourceConnector(SourceConnector):
+    """One of the bundled source files, filtered through its columnar index"""
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        simulated_latency: Tuple[float, float] = (4, 8),
+        **options,
+    ):
+        # Converting a large file takes as long as it takes; the processor's
+        # per-source timeout still bounds the whole read
+        options.setdefault("request_timeout", None)
+        super().__init__(**options)
+        if name not in SOURCE_READERS:
+            raise ValueError(f"No file reader for {name}")
+        self.name = name
+        self.path = path or SOURCE_FILES[name]
+        self.batch_size = batch_size
+        self.simulated_latency = simulated_latency
+
+    async def _select(self, query: SourceQuery, timer: Optional[StageTimer] = None):
+        """Orders matching the query, from the columnar store or the in-memory index cache"""
+        timer = timer or StageTimer(SOURCE_STAGE_SECONDS, source=self.name)
+        build = partial(parse_pool.build_index, source=self.name)
+        with timer.time("parse"):
+            # Only parses when the file changed; otherwise maps or reuses the index
+            if COLUMNAR_CACHE_ENABLED:
+                index = await asyncio.to_thread(columnar_store.get_index, self.path, self.name, build)
+            else:
+                index = await asyncio.to_thread(source_cache.get_index, self.path, build)
+        if index is None:
+            # Too large to cache: filter while streaming the file
+            if parse_pool.enabled:
+                return parse_pool.stream_orders(
+                    self.path, self.name, query.date_from, query.date_to, query.categories
+                )
+            SOURCE_BYTES_READ.inc(os.path.getsize(self.path), source=self.name)
+            return filter_orders(
+                SOURCE_READERS[self.name](self.path), query.date_from, query.date_to, query.categories
+            )
+        with timer.time("filter"):
+            positions = index.select(query.date_from, query.date_to, query.categories)
+        return index.rows(positions, self.batch_size)
+
+    async def simulate_latency(self):
+        """Wait like a remote source would, when delays are simulated"""
+        if self.simulate_delays and self.simulated_latency[1] > 0:
+            await asyncio.sleep(random.uniform(*self.simulated_latency))
+
+    async def fetch(self, query: SourceQuery) -> AsyncIterator[List[Dict]]:
+        await self.simulate_latency()
+        timer = StageTimer(SOURCE_STAGE_SECONDS, source=self.name)
+        try:
+            orders = await self.call(self._select, query, timer)
+            if hasattr(orders, "__aiter__"):
+                # Batches parsed and filtered by the parse pool
+                while True:
+                    with timer.time("parse"):
+                        batch = await anext(orders, None)
+                    if batch is None:
+                        return
+                    yield batch
+            # Materializing rows is CPU work; keep it out of the event loop
+            iterator = chunked(orders, self.batch_size)
+            while True:
+                with timer.time("filter"):
+                    batch = await asyncio.to_thread(next, iterator, None)
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            timer.observe()
+
+
+class HttpSourceConnector(SourceConnector):
+    """A paginated HTTP API returning ``{"orders": [...], "next_cursor": ...}``.
+
+    Filters are sent as ``date_from``, ``date_to`` and repeated ``category``
+    query parameters. Timeouts, connection errors, 429 and 5xx responses
+    are retried.
+    """
+
+    def __init__(self, name: str, base_url: str, page_size: int = DEFAULT_PAGE_SIZE, **options):
+        super().__init__(**options)
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.request_timeout)
+        return self._client
+
+    async def fetch_page(self, query: SourceQuery, cursor: Optional[Any]) -> Page:
+        params = {"limit": self.page_size}
+        if query.date_from and query.date_to:
+            params["date_from"] = query.date_from.isoformat()
+            params["date_to"] = query.date_to.isoformat()
+        if query.categories:
+            params["category"] = list(query.categories)
+        if cursor is not None:
+            params["cursor"] = cursor
+        try:
+            response = await self._get_client().get("/orders", params=params)
+        except httpx.TransportError as e:
+            raise TransientConnectorError(f"{type(e).__name__}: {e}") from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientConnectorError(f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise ConnectorError(f"{self.name} returned HTTP {response.status_code}")
+        body = response.json()
+        orders = [parse_order(row, self.name) for row in body["orders"]]
+        return Page(orders=orders, next_cursor=body.get("next_cursor"))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ConnectorRegistry:
+    """Connectors by name; tasks refer to the connectors they read from by name"""
+
+    def __init__(self, simulate_delays: bool = SIMULATE_DELAYS):
+        self._connectors: Dict[str, SourceConnector] = {}
+        self.simulate_delays = simulate_delays
+
+    def register(self, connector: SourceConnector) -> SourceConnector:
+        if not connector.name:
+            raise ValueError("Connectors need a name")
+        connector.simulate_delays = self.simulate_delays
+        self._connectors[connector.name] = connector
+        logger.info("Registered connector %s (%s)", connector.name, type(connector).__name__)
+        return connector
+
+    def get(self, name: str) -> SourceConnector:
+        try:
+            return self._connectors[name]
+        except KeyError:
+            raise UnknownConnectorError(f"Unknown connector {name!r}") from None
+
+    def set_simulate_delays(self, enabled: bool):
+        """Turn the simulated latency of every connector, current and future, on or off"""
+        self.simulate_delays = enabled
+        for connector in self._connectors.values():
+            connector.simulate_delays = enabled
+
+    def names(self) -> List[str]:
+        return list(self._connectors)
+
+    async def close(self):
+        for connector in self._connectors.values():
+            if hasattr(connector, "close"):
+                await connector.close()
+
+    def get_metrics(self) -> Dict:
+        return {name: connector.get_metrics() for name, connector in self._connectors.items()}
+
+
+def task_connectors(task) -> List[Dict]:
+    """The ``{"name", "filters"}`` connectors of a task.
+
+    Tasks created with the source_a/source_b flags have no connector list,
+    so it is derived from the flags.
+    """
+    if task.connectors is not None:
+        return list(task.connectors)
+    return [
+        {"name": name, "filters": getattr(task, f"{name}_filters")}
+        for name in LEGACY_CONNECTORS
+        if getattr(task, f"{name}_enabled")
+    ]
+
+
+def source_query(task, filters: Any) -> SourceQuery:
+    return SourceQuery(task.date_from, task.date_to, categories_from_filters(filters))
+
+
+connector_registry = ConnectorRegistry()
+for _name in LEGACY_CONNECTORS:
+    connector_registry.register(FileSourceConnector(_name))
+if MOCK_SOURCE_URL:
+    connector_registry.register(HttpSourceConnector("mock_http", MOCK_SOURCE_URL))
@@ -0,0 +1,155 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+from .order_store import ORDER_COLUMNS, task_order_rows
+
+ORDER_FIELDS = ORDER_COLUMNS
+SORTABLE_FIELDS = (
+    "id",
+    "order_id",
+    "order_date",
+    "source",
+    "product_name",
+    "product_category",
+    "quantity",
+    "unit_price",
+    "total_amount",
+    "customer_country",
+)
+DEFAULT_SORT = [("order_date", False)]
+
+
+class InvalidOrderQueryError(ValueError):
+    """Raised for unknown sort keys, fields or malformed cursors"""
+
+
+def parse_sort(value: Optional[str]) -> List[Tuple[str, bool]]:
+    """Parse ``"-total_amount,order_date"`` into (field, descending) pairs"""
+    if not value:
+        return list(DEFAULT_SORT)
+    keys = []
+    for key in value.split(","):
+        key = key.strip()
+        descending = key.startswith("-")
+        name = key.lstrip("+-")
+        if name not in SORTABLE_FIELDS:
+            raise InvalidOrderQueryError(f"Cannot sort by {name!r}")
+        keys.append((name, descending))
+    return keys
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a ``fields=`` projection, keeping the requested order"""
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in ORDER_FIELDS]
+    if unknown:
+        raise InvalidOrderQueryError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+@dataclass
+class OrderQuery:
+    """Filters, sort order and projection applied to a task's orders"""
+    sources: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    countries: Optional[List[str]] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    sort: List[Tuple[str, bool]] = field(default_factory=lambda: list(DEFAULT_SORT))
+    fields: Optional[List[str]] = None
+
+    @property
+    def keys(self) -> List[Tuple[str, bool]]:
+        """Sort keys, with id as the final tie-breaker so positions are unique"""
+        keys = list(self.sort)
+        if "id" not in (name for name, _ in keys):
+            keys.append(("id", False))
+        return keys
+
+    @property
+    def sort_spec(self) -> str:
+        return ",".join(("-" if descending else "") + name for name, descending in self.sort)
+
+    def encode_cursor(self, row: Any) -> str:
+        """Opaque cursor pointing just past ``row`` in this query's order"""
+        values = [getattr(row, name) for name, _ in self.keys]
+        payload = json.dumps({
+            "sort": self.sort_spec,
+            "values": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        })
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> List[Any]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values = payload["values"]
+            if payload["sort"] != self.sort_spec or len(values) != len(self.keys):
+                raise ValueError("cursor was issued for a different sort order")
+            return [
+                datetime.fromisoformat(value) if name == "order_date" else value
+                for (name, _), value in zip(self.keys, values)
+            ]
+        except (ValueError, TypeError, KeyError) as e:
+            raise InvalidOrderQueryError(f"Invalid cursor: {cursor}") from e
+
+    def output_fields(self) -> Sequence[str]:
+        return self.fields or ORDER_FIELDS
+
+    def project(self, row: Any) -> Dict:
+        """Row as a dict limited to the requested fields"""
+        return {name: getattr(row, name) for name in self.output_fields()}
+
+    @property
+    def filtered(self) -> bool:
+        """Whether any filter narrows the task's orders"""
+        return bool(self.conditions())
+
+    def conditions(self) -> List:
+        """Filter clauses over ``task_order_rows``"""
+        orders = task_order_rows
+        clauses = []
+        if self.sources:
+            clauses.append(orders.c.source.in_(self.sources))
+        if self.categories:
+            clauses.append(orders.c.product_category.in_(self.categories))
+        if self.countries:
+            clauses.append(orders.c.customer_country.in_(self.countries))
+        if self.date_from is not None:
+            clauses.append(orders.c.order_date >= self.date_from)
+        if self.date_to is not None:
+            clauses.append(orders.c.order_date <= self.date_to)
+        if self.min_amount is not None:
+            clauses.append(orders.c.total_amount >= self.min_amount)
+        if self.max_amount is not None:
+            clauses.append(orders.c.total_amount <= self.max_amount)
+        return clauses
+
+    def build(self, task_id: int, cursor: Optional[str] = None):
+        """Core select of the task's matching orders, starting after ``cursor``"""
+        orders = task_order_rows
+        # Sort keys are always selected so the next cursor can be built
+        names = list(dict.fromkeys(list(self.output_fields()) + [name for name, _ in self.keys]))
+        query = select(*(orders.c[name] for name in names)).where(
+            orders.c.task_id == task_id, *self.conditions()
+        )
+
+        keys = [(orders.c[name], descending) for name, descending in self.keys]
+        if cursor:
+            values = self.decode_cursor(cursor)
+            # Keyset condition: rows strictly after the cursor in sort order
+            clauses = []
+            for i, (column, descending) in enumerate(keys):
+                ties = [c == v for (c, _), v in zip(keys[:i], values[:i])]
+                step = column < values[i] if descending else column > values[i]
+                clauses.append(and_(*ties, step))
+            query = query.where(or_(*clauses))
+
+        return query.order_by(*(column.desc() if descending else column for column, descending in keys))
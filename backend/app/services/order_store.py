@@ -0,0 +1,176 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import String, cast, delete, exists, insert, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import SourceOrder, TaskOrder
+
+# Columns of a task's orders, in the order the API returns them
+ORDER_COLUMNS = (
+    "id",
+    "task_id",
+    "source",
+    "order_id",
+    "order_date",
+    "total_amount",
+    "product_name",
+    "product_category",
+    "quantity",
+    "unit_price",
+    "customer_id",
+    "customer_country",
+    "source_specific_data",
+)
+
+# Columns a source sync overwrites when a stored order changed
+MERGED_COLUMNS = tuple(name for name in ORDER_COLUMNS if name not in ("id", "task_id", "source", "order_id"))
+
+# Backends with an upsert; others only add orders not stored yet
+UPSERT_DIALECTS = ("postgresql", "sqlite")
+
+# A task's orders: its memberships joined to the shared source orders. Reads
+# and rollups select from this like from a per-task orders table.
+task_order_rows = (
+    select(*(TaskOrder.task_id if name == "task_id" else getattr(SourceOrder, name) for name in ORDER_COLUMNS))
+    .join_from(TaskOrder, SourceOrder, TaskOrder.source_order_id == SourceOrder.id)
+    .subquery("task_order_rows")
+)
+
+
+def _insert_ignoring_duplicates(dialect: str, table, index_elements: List[str]):
+    """INSERT that skips rows conflicting on ``index_elements``"""
+    if dialect == "postgresql":
+        return postgresql_insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    # Other backends rely on the existence check done before inserting
+    return insert(table)
+
+
+async def store_orders(db: AsyncSession, task_id: int, orders: List[Dict]) -> int:
+    """Add a chunk of orders to a task; returns how many were not stored yet.
+
+    Orders already stored by an earlier task are linked to this one, so
+    storage grows with the number of distinct orders, not of tasks. Stored
+    orders whose values changed in the source are overwritten first, so the
+    task never links a row that differs from what its filters were checked
+    against; the overwritten rows get a new ``synced_at``.
+    """
+    dialect = db.get_bind().dialect.name
+    upsert = upsert_source_orders(dialect)
+    by_source: Dict[str, Dict[str, Dict]] = {}
+    for order in orders:
+        by_source.setdefault(order["source"], {})[order["order_id"]] = order
+
+    stored = 0
+    for source, source_orders in by_source.items():
+        order_ids = list(source_orders)
+        in_chunk = (SourceOrder.source == source) & SourceOrder.order_id.in_(order_ids)
+        existing = set((await db.execute(select(SourceOrder.order_id).where(in_chunk))).scalars())
+        now = datetime.utcnow()
+        if dialect in UPSERT_DIALECTS:
+            rows = [dict(order, synced_at=now) for order in source_orders.values()]
+        else:
+            rows = [dict(order, synced_at=now) for order_id, order in source_orders.items() if order_id not in existing]
+        if rows:
+            await db.execute(upsert, rows)
+        stored += len(source_orders) - len(existing)
+        await db.execute(
+            _insert_ignoring_duplicates(dialect, TaskOrder.__table__, ["task_id", "source_order_id"])
+            .from_select(["task_id", "source_order_id"], select(literal(task_id), SourceOrder.id).where(in_chunk))
+        )
+    return stored
+
+
+def upsert_source_orders(dialect: str):
+    """Statement merging synced orders into ``source_orders``, executed with a list of orders.
+
+    New orders are inserted and stored orders whose values differ are
+    overwritten; only those rows get a new ``synced_at``, so unchanged
+    orders are not picked up again by task refreshes.
+    """
+    table = SourceOrder.__table__
+    if dialect == "postgresql":
+        statement = postgresql_insert(table)
+    elif dialect == "sqlite":
+        statement = sqlite_insert(table)
+    else:
+        # No portable upsert: only orders not stored yet are added
+        return insert(table)
+
+    def differs(name: str):
+        stored, synced = table.c[name], statement.excluded[name]
+        if name == "source_specific_data":
+            # JSON values have no equality operator in PostgreSQL
+            stored, synced = cast(stored, String), cast(synced, String)
+        return stored.is_distinct_from(synced)
+
+    return statement.on_conflict_do_update(
+        index_elements=["source", "order_id"],
+        set_={name: statement.excluded[name] for name in MERGED_COLUMNS + ("synced_at",)},
+        where=or_(*(differs(name) for name in MERGED_COLUMNS)),
+    )
+
+
+def source_order_filter(
+    source: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    categories: Optional[List[str]] = None,
+):
+    """A task's filters on one source as a condition on SourceOrder, as in filter_orders"""
+    condition = SourceOrder.source == source
+    # Apply date filter only if dates are specified
+    if date_from and date_to:
+        condition = condition & SourceOrder.order_date.between(date_from, date_to)
+    # Apply category filter only if categories are specified
+    if categories:
+        condition = condition & SourceOrder.product_category.in_(categories)
+    return condition
+
+
+def link_synced_orders(task_id: int, matches, since: Optional[datetime] = None):
+    """Statement linking the not yet linked orders synced after ``since`` that match a task.
+
+    ``matches`` is the task's filter as a condition on SourceOrder.
+    """
+    linked = exists().where(TaskOrder.task_id == task_id, TaskOrder.source_order_id == SourceOrder.id)
+    synced = select(literal(task_id), SourceOrder.id).where(matches, ~linked)
+    if since is not None:
+        synced = synced.where(SourceOrder.synced_at > since)
+    return insert(TaskOrder).from_select(["task_id", "source_order_id"], synced)
+
+
+def unlink_synced_orders(task_id: int, source: str, matches, since: Optional[datetime] = None):
+    """Statement unlinking a task's orders of ``source`` that changed after
+    ``since`` and no longer match it"""
+    changed = select(SourceOrder.id).where(SourceOrder.source == source, ~matches)
+    if since is not None:
+        changed = changed.where(SourceOrder.synced_at > since)
+    return delete(TaskOrder).where(TaskOrder.task_id == task_id, TaskOrder.source_order_id.in_(changed))
+
+
+def tasks_with_synced_orders(source: str, since: datetime):
+    """Statement selecting the tasks linked to orders of ``source`` synced after ``since``"""
+    return (
+        select(TaskOrder.task_id)
+        .join(SourceOrder, TaskOrder.source_order_id == SourceOrder.id)
+        .where(SourceOrder.source == source, SourceOrder.synced_at > since)
+        .distinct()
+    )
+
+
+def delete_task_orders(task_id: int, source: Optional[str] = None):
+    """Statement unlinking a task's orders, optionally only those of one source.
+
+    The shared source orders are kept for other tasks.
+    """
+    statement = delete(TaskOrder).where(TaskOrder.task_id == task_id)
+    if source is not None:
+        statement = statement.where(
+            TaskOrder.source_order_id.in_(select(SourceOrder.id).where(SourceOrder.source == source))
+        )
+    return statement
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .metrics import SOURCE_BYTES_READ
+from .source_index import SourceIndex
+from .source_readers import SHARD_READERS, SOURCE_READERS, filter_orders
+
+logger = logging.getLogger(__name__)
+
+# 0 parses in the calling thread instead of in worker processes
+DEFAULT_PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_SHARD_BYTES = int(float(os.getenv("PARSE_SHARD_MB", "8")) * 1024 * 1024)
+
+
+def shard_ranges(path: str, shard_bytes: int, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Split a file, or its [start, end) byte range, into ranges of at most ``shard_bytes``"""
+    end = os.path.getsize(path) if end is None else end
+    return [(offset, min(offset + shard_bytes, end)) for offset in range(start, end, shard_bytes)]
+
+
+def parse_shard_frame(source: str, path: str, start: int, end: int) -> pd.DataFrame:
+    """Parse one shard into a DataFrame, which pickles far smaller than dicts"""
+    return pd.DataFrame.from_records(list(SHARD_READERS[source](path, start, end)))
+
+
+def parse_shard_orders(
+    source: str,
+    path: str,
+    start: int,
+    end: int,
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    categories: Optional[List[str]],
+) -> List[Dict]:
+    """Parse and filter one shard, so only matching orders are sent back"""
+    return list(filter_orders(SHARD_READERS[source](path, start, end), date_from, date_to, categories))
+
+
+class ParsePool:
+    """Process pool that parses source files in byte-range shards.
+
+    Parsing is CPU-bound; in worker processes it neither holds the GIL of
+    the API process nor stalls its event loop, and large files are parsed
+    on all cores at once. Workers are started on first use.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_PARSE_WORKERS, shard_bytes: int = DEFAULT_SHARD_BYTES):
+        self.max_workers = max(0, max_workers)
+        self.shard_bytes = max(1, shard_bytes)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.shards_parsed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs threads and an event loop is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info("Started parse pool with %s workers", self.max_workers)
+            return self._executor
+
+    def build_index(self, path: str, source: str) -> SourceIndex:
+        """Parse ``path`` on the pool and build its columnar index; blocks until done"""
+        SOURCE_BYTES_READ.inc(os.path.getsize(path), source=source)
+        if not self.enabled:
+            return SourceIndex.from_orders(SOURCE_READERS[source](path))
+        executor = self._get_executor()
+        futures = [
+            executor.submit(parse_shard_frame, source, path, start, end)
+            for start, end in shard_ranges(path, self.shard_bytes)
+        ]
+        frames = [future.result() for future in futures]
+        self.shards_parsed += len(frames)
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return SourceIndex.from_frame(frame)
+
+    async def stream_orders(
+        self,
+        path: str,
+        source: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """Filtered orders of ``path`` as one batch per shard, in file order.
+
+        Only orders starting in the [start, end) byte range are read. At
+        most two shards per worker are in flight, which bounds memory for
+        files of any size.
+        """
+        executor = self._get_executor()
+        pending = deque()
+        try:
+            for start, end in shard_ranges(path, self.shard_bytes, start, end):
+                future = executor.submit(
+                    parse_shard_orders, source, path, start, end, date_from, date_to, categories
+                )
+                pending.append((asyncio.wrap_future(future), end - start))
+                if len(pending) >= 2 * self.max_workers:
+                    yield await self._next_shard(pending, source)
+            while pending:
+                yield await self._next_shard(pending, source)
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+    async def _next_shard(self, pending: deque, source: str) -> List[Dict]:
+        future, size = pending.popleft()
+        orders = await future
+        self.shards_parsed += 1
+        SOURCE_BYTES_READ.inc(size, source=source)
+        return orders
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def get_metrics(self) -> Dict:
+        return {
+            "workers": self.max_workers,
+            "shard_bytes": self.shard_bytes,
+            "shards_parsed": self.shards_parsed,
+        }
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,134 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = float(os.getenv("PROFILER_INTERVAL_MS", "10")) / 1000
+# The /api/profiler endpoints dump every thread's stack, so they are
+# only served when explicitly turned on
+PROFILER_API_ENABLED = os.getenv("PROFILER_API", "false").lower() in ("1", "true", "yes")
+# Frames kept per sample, innermost last
+MAX_STACK_DEPTH = 64
+# Functions parked threads sit in; not work, so left out of ``top``
+IDLE_FUNCTIONS = {
+    ("wait", "threading.py"),
+    ("get", "queue.py"),
+    ("select", "selectors.py"),
+    ("_worker", "thread.py"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(label: str) -> bool:
+    name, _, location = label.partition(" (")
+    return (name, location.split(":", 1)[0]) in IDLE_FUNCTIONS
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of every thread of the process.
+
+    A background thread records each thread's stack every ``interval``
+    seconds, so the cost is a fixed number of samples per second whatever
+    the load. Stacks are counted in the folded format of flame graph tools
+    (``outer;inner count``). Work done in the parse pool's worker processes
+    is not sampled.
+    """
+
+    def __init__(self):
+        self.interval = DEFAULT_INTERVAL
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None, reset: bool = True):
+        with self._lock:
+            if self.running:
+                return
+            if interval is not None:
+                self.interval = max(0.001, interval)
+            if reset:
+                self._stacks.clear()
+                self.samples = 0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        logger.info("Sampling profiler started, interval %.1f ms", self.interval * 1000)
+
+    def stop(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self.stopped_at = time.time()
+        logger.info("Sampling profiler stopped after %d samples", self.samples)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(labels)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def folded(self) -> str:
+        """Sampled stacks in the folded format, most frequent first"""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def top(self, limit: int = 20, include_idle: bool = False) -> List[Dict]:
+        """Functions seen most often at the top of a stack"""
+        leaves: Counter = Counter()
+        with self._lock:
+            for stack, count in self._stacks.items():
+                leaf = stack.rsplit(";", 1)[-1]
+                if include_idle or not _is_idle(leaf):
+                    leaves[leaf] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": name, "samples": count, "share": count / total}
+            for name, count in leaves.most_common(limit)
+        ]
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from .metrics import metrics
+
+# Tasks a client may create per minute once its burst is used up; 0 disables the limit
+DEFAULT_TASK_RATE = float(os.getenv("TASK_RATE_LIMIT_PER_MINUTE", "30"))
+DEFAULT_TASK_BURST = int(os.getenv("TASK_RATE_LIMIT_BURST", "10"))
+# Clients tracked at once; the least recently seen are forgotten first
+MAX_CLIENTS = 10_000
+
+RATE_LIMITED = metrics.counter("rate_limited_requests_total", "Requests refused by a rate limiter", ["limiter"])
+
+
+class RateLimiter:
+    """Token bucket per client, refilled at ``rate_per_minute``.
+
+    Each client may make ``burst`` requests at once and then one per
+    refill interval. Buckets live in this process only, so with several
+    workers the effective limit is multiplied by their number.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float = DEFAULT_TASK_RATE, burst: int = DEFAULT_TASK_BURST):
+        self.name = name
+        self.rate = rate_per_minute / 60
+        self.burst = max(1, burst)
+        # Per client: tokens left and when they were counted
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, client: str) -> float:
+        """Take a token for ``client``; 0 if allowed, else seconds until one is available"""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.limited += 1
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        if wait:
+            RATE_LIMITED.inc(limiter=self.name)
+        return wait
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "rate_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "clients": len(self._buckets),
+                "allowed": self.allowed,
+                "limited": self.limited,
+            }
+
+
+task_rate_limiter = RateLimiter("create_task")
@@ -0,0 +1,197 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.models import Task, TaskStatus
+from .metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional; responses are then only gzip-compressed
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "true").lower() in ("1", "true", "yes")
+DEFAULT_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024
+# Smaller bodies are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Responses of tasks in these states never change until the task is re-processed
+CACHEABLE_STATUSES = (TaskStatus.COMPLETED, TaskStatus.PARTIALLY_COMPLETED)
+
+CACHE_REQUESTS = metrics.counter(
+    "response_cache_requests_total", "Response cache lookups (hit, miss) and 304 responses (not_modified)", ["result"]
+)
+
+CacheKey = Tuple[int, str, str]
+
+
+def task_version(task: Task) -> Optional[str]:
+    """Identifies one finished state of a task; None while its responses may still change.
+
+    ``revision`` moves when a refresh or ingest of another task overwrites
+    orders this task shares, so every process stops serving the old bodies.
+    """
+    if task.status not in CACHEABLE_STATUSES:
+        return None
+    completed_at = task.completed_at.isoformat() if task.completed_at else ""
+    synced_at = task.synced_at.isoformat() if task.synced_at else ""
+    return f"{task.status.value}:{completed_at}:{synced_at}:{task.revision or 0}"
+
+
+def request_key(path: str, params: Iterable[Tuple[str, str]]) -> str:
+    """Path and normalized query string; parameter order does not matter"""
+    return path + "?" + "&".join(f"{name}={value}" for name, value in sorted(params))
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag``"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _accepted_encodings(header: Optional[str]) -> List[str]:
+    """Encodings the client accepts, without those it refuses with q=0"""
+    encodings = []
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            encodings.append(name.lower())
+    return encodings
+
+
+@dataclass
+class CachedResponse:
+    etag: str
+    body: bytes
+    media_type: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Compressed bodies by content coding, built once when the entry is stored
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes]:
+        """Best stored encoding the client accepts, and its body"""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and encoding in accepted:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+
+class ResponseCache:
+    """Process-wide LRU cache of serialized responses of finished tasks.
+
+    Entries are keyed by task, by the task's finished state (see
+    ``task_version``) and by the request. A task that is re-processed,
+    refreshed or has shared orders overwritten gets a new version, so
+    other processes never serve its stale responses; this process also
+    drops them right away. Bodies are
+    stored with their gzip and, when the ``brotli`` package is installed,
+    brotli encodings, and served with an ETag so unchanged responses are
+    revalidated with a 304.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, task_id: int, version: Optional[str], key: str) -> Optional[CachedResponse]:
+        if not self.enabled or version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((task_id, version, key))
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end((task_id, version, key))
+                self.hits += 1
+        CACHE_REQUESTS.inc(result="miss" if entry is None else "hit")
+        return entry
+
+    def build(self, body: bytes, media_type: str, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """Entry for a serialized body, with its ETag and compressed encodings"""
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = CachedResponse(etag=etag, body=body, media_type=media_type, headers=dict(headers or {}))
+        if len(body) >= COMPRESS_MIN_BYTES:
+            entry.encoded["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                entry.encoded["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+        return entry
+
+    def put(self, task_id: int, version: Optional[str], key: str, entry: CachedResponse):
+        if not self.enabled or version is None or entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            cache_key = (task_id, version, key)
+            if cache_key in self._entries:
+                self._remove(cache_key)
+            self._entries[cache_key] = entry
+            self.total_bytes += entry.nbytes
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, task_id: int):
+        """Drop every cached response of a task"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == task_id]
+            for key in stale:
+                self._remove(key)
+        if stale:
+            logger.info("Dropped %s cached responses of task %s", len(stale), task_id)
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+        CACHE_REQUESTS.inc(result="not_modified")
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "brotli": brotli is not None,
+            }
+
+
+response_cache = ResponseCache()
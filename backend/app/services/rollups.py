@@ -0,0 +1,85 @@
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+from ..models.models import TaskRollup, TaskCountryRollup
+from .order_store import task_order_rows
+
+orders = task_order_rows.c
+
+TIME_BUCKETS = ("day", "week", "month")
+
+
+def bucket_expression(dialect: str, bucket: str, column=orders.order_date):
+    """``column`` truncated to the start of its day, week (Monday) or month"""
+    if bucket not in TIME_BUCKETS:
+        raise ValueError(f"Unknown time bucket: {bucket}")
+    if dialect == "postgresql":
+        return func.to_char(func.date_trunc(bucket, column), "YYYY-MM-DD")
+    if bucket == "day":
+        return func.strftime("%Y-%m-%d", column)
+    if bucket == "week":
+        # Move to the following Sunday (or stay on it), then back to Monday
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
+
+
+def delete_task_rollups(db: Session, task_id: int):
+    db.query(TaskRollup).filter(TaskRollup.task_id == task_id).delete(synchronize_session=False)
+    db.query(TaskCountryRollup).filter(TaskCountryRollup.task_id == task_id).delete(synchronize_session=False)
+
+
+def build_task_rollups(db: Session, task_id: int):
+    """Materialize the rollups of a task from its orders, inside the database.
+
+    The caller commits, so the rollups become visible together with the
+    task's final status.
+    """
+    delete_task_rollups(db, task_id)
+    dialect = db.get_bind().dialect.name
+
+    for bucket in TIME_BUCKETS:
+        period = bucket_expression(dialect, bucket)
+        rows = (
+            select(
+                literal(task_id),
+                literal(bucket),
+                period,
+                orders.source,
+                orders.product_category,
+                func.sum(orders.total_amount),
+                func.count(orders.id),
+                func.min(orders.order_date),
+                func.max(orders.order_date),
+            )
+            .where(orders.task_id == task_id)
+            .group_by(period, orders.source, orders.product_category)
+        )
+        db.execute(
+            insert(TaskRollup).from_select(
+                [
+                    "task_id",
+                    "bucket",
+                    "period",
+                    "source",
+                    "product_category",
+                    "total_amount",
+                    "order_count",
+                    "first_order_date",
+                    "last_order_date",
+                ],
+                rows,
+            )
+        )
+
+    db.execute(
+        insert(TaskCountryRollup).from_select(
+            ["task_id", "customer_country", "total_amount", "order_count"],
+            select(
+                literal(task_id),
+                orders.customer_country,
+                func.sum(orders.total_amount),
+                func.count(orders.id),
+            )
+            .where(orders.task_id == task_id)
+            .group_by(orders.customer_country),
+        )
+    )
@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from .source_index import SourceIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(os.getenv("SOURCE_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+@dataclass
+class CacheEntry:
+    mtime_ns: int
+    size: int
+    index: SourceIndex
+    nbytes: int
+
+
+class SourceCache:
+    """Process-wide LRU cache of parsed source files as columnar indexes.
+
+    Entries are keyed by file path and validated against the file's mtime
+    and size, so a rewritten file is parsed again on its next use. Files
+    whose parsed form would not fit in the memory cap are not cached and
+    callers fall back to streaming them.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+
+    def get_index(self, path: str, build: Callable[[str], SourceIndex]) -> Optional[SourceIndex]:
+        """Columnar index of ``path``, built from the file on a miss.
+
+        Returns None when the file is too large to cache. An index that
+        turns out larger than the cap is returned without being cached.
+        """
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry.index
+            self.misses += 1
+            if entry:
+                # The file changed since it was cached
+                self._remove(path)
+
+        # Parsed rows are always larger than the raw file
+        if stat.st_size > self.max_bytes:
+            with self._lock:
+                self.bypasses += 1
+            return None
+
+        index = build(path)
+        nbytes = index.nbytes
+        if nbytes > self.max_bytes:
+            with self._lock:
+                self.bypasses += 1
+            logger.info("Not caching %s: parsed size exceeds %s bytes", path, self.max_bytes)
+            return index
+
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            self._entries[path] = CacheEntry(stat.st_mtime_ns, stat.st_size, index, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        logger.info("Cached %s parsed orders from %s", len(index), path)
+        return index
+
+    def _remove(self, path: str):
+        entry = self._entries.pop(path)
+        self.total_bytes -= entry.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bypasses": self.bypasses,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+source_cache = SourceCache()
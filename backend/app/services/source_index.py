@@ -0,0 +1,175 @@
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality string columns stored as integer codes plus a dictionary
+DICTIONARY_COLUMNS = ("source", "product_category", "product_name", "customer_country")
+
+ROW_CHUNK_SIZE = 5000
+
+
+def to_datetime64(value: datetime) -> np.datetime64:
+    """Naive UTC datetime64 for comparisons against the order_date column"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_datetime64()
+
+
+class StringColumn:
+    """Variable-length strings as one UTF-8 buffer plus offsets, Arrow style.
+
+    Both parts are flat arrays, so they can be memory-mapped from disk and
+    only the selected values are ever decoded.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, valid: Optional[np.ndarray] = None):
+        self.offsets = offsets
+        self.data = data
+        self.valid = valid
+
+    @classmethod
+    def from_values(cls, values: Iterable[Optional[str]]) -> "StringColumn":
+        values = list(values)
+        encoded = [b"" if value is None else str(value).encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        valid = None
+        if any(value is None for value in values):
+            valid = np.array([value is not None for value in values], dtype=bool)
+        return cls(offsets, data, valid)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.data.nbytes + (self.valid.nbytes if self.valid is not None else 0)
+
+    def take(self, positions: np.ndarray) -> List[Optional[str]]:
+        starts = self.offsets[positions].tolist()
+        stops = self.offsets[np.asarray(positions) + 1].tolist()
+        data = self.data
+        values = [bytes(data[start:stop]).decode("utf-8") for start, stop in zip(starts, stops)]
+        if self.valid is not None:
+            valid = self.valid[positions].tolist()
+            values = [value if ok else None for value, ok in zip(values, valid)]
+        return values
+
+
+class SourceIndex:
+    """Columnar view of a parsed source, sorted by order_date.
+
+    The date range of a task is located with a binary search over the
+    sorted order_date column and the category filter is a vectorized mask
+    over dictionary-encoded category codes. Rows are only turned back into
+    dicts for the positions that were selected.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], dictionaries: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.names = list(columns)
+        self.order_dates = columns["order_date"]
+        self.nbytes = self._estimate_nbytes()
+
+    @classmethod
+    def from_orders(cls, orders: Iterable[Dict]) -> "SourceIndex":
+        return cls.from_frame(pd.DataFrame.from_records(list(orders)))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "SourceIndex":
+        if frame.empty:
+            frame = pd.DataFrame({"order_date": pd.Series([], dtype="datetime64[ns]")})
+        # Naive values are taken as UTC, aware values are converted to it
+        frame["order_date"] = pd.to_datetime(frame["order_date"], utc=True).dt.tz_convert(None)
+        frame = frame.sort_values("order_date", kind="stable", ignore_index=True)
+
+        columns = {}
+        dictionaries = {}
+        for name in frame.columns:
+            if name in DICTIONARY_COLUMNS:
+                codes, uniques = pd.factorize(frame[name])
+                columns[name] = codes.astype(np.int32)
+                dictionaries[name] = np.asarray(uniques, dtype=object)
+            else:
+                columns[name] = frame[name].to_numpy()
+        return cls(columns, dictionaries)
+
+    def __len__(self) -> int:
+        return len(self.order_dates)
+
+    def _estimate_nbytes(self) -> int:
+        nbytes = 0
+        for array in list(self.columns.values()) + list(self.dictionaries.values()):
+            nbytes += array.nbytes
+            if isinstance(array, StringColumn):
+                continue
+            if array.dtype == object:
+                nbytes += sum(sys.getsizeof(value) for value in array)
+        return nbytes
+
+    def select(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+    ) -> np.ndarray:
+        """Positions of the orders matching a task's filters, in date order"""
+        start, stop = 0, len(self)
+        # Apply date filter only if dates are specified
+        if date_from and date_to:
+            start = int(np.searchsorted(self.order_dates, to_datetime64(date_from), side="left"))
+            stop = int(np.searchsorted(self.order_dates, to_datetime64(date_to), side="right"))
+            stop = max(start, stop)
+        positions = np.arange(start, stop)
+
+        # Apply category filter only if categories are specified
+        if categories:
+            dictionary = self.dictionaries.get("product_category", np.array([], dtype=object))
+            wanted = np.flatnonzero(np.isin(dictionary, list(categories)))
+            mask = np.isin(self.columns["product_category"][start:stop], wanted)
+            positions = positions[mask]
+        return positions
+
+    def _column_values(self, name: str, positions: np.ndarray) -> list:
+        column = self.columns[name]
+        if isinstance(column, StringColumn):
+            return column.take(positions)
+        values = column[positions]
+        if name in self.dictionaries:
+            return self.dictionaries[name][values].tolist()
+        if name == "order_date":
+            # Microsecond precision converts to datetime.datetime objects
+            return values.astype("datetime64[us]").tolist()
+        return values.tolist()
+
+    def rows(self, positions: np.ndarray, chunk_size: int = ROW_CHUNK_SIZE) -> "RowSelection":
+        """The selected positions as order dicts, materialized a chunk at a time"""
+        return RowSelection(self, positions, chunk_size)
+
+    def iter_rows(self, positions: np.ndarray, chunk_size: int = ROW_CHUNK_SIZE) -> Iterator[Dict]:
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start:start + chunk_size]
+            columns = [self._column_values(name, chunk) for name in self.names]
+            for values in zip(*columns):
+                yield dict(zip(self.names, values))
+
+
+class RowSelection:
+    """Lazily materialized rows of a SourceIndex whose size is known up front"""
+
+    def __init__(self, index: SourceIndex, positions: np.ndarray, chunk_size: int = ROW_CHUNK_SIZE):
+        self.index = index
+        self.positions = positions
+        self.chunk_size = chunk_size
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.index.iter_rows(self.positions, self.chunk_size)
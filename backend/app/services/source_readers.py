@@ -0,0 +1,269 @@
+import codecs
+import csv
+import json
+import mmap
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+SOURCE_A_FILE = os.path.join(DATA_DIR, "source_a_orders.json")
+SOURCE_B_FILE = os.path.join(DATA_DIR, "source_b_orders.csv")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_WHITESPACE_BYTES = b" \t\n\r"
+
+
+def iter_json_array(f: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """Incrementally decode the items of a top-level JSON array.
+
+    Only the item being decoded and one read chunk are held in memory, so
+    arbitrarily large files can be consumed item by item.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        # Skip whitespace and separators up to the next token
+        while pos < len(buffer) and (
+            buffer[pos] in _WHITESPACE or (started and buffer[pos] == ",")
+        ):
+            pos += 1
+        if pos >= len(buffer):
+            if eof or not fill():
+                raise ValueError("Unexpected end of JSON array")
+            continue
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a top-level JSON array")
+            started = True
+            pos += 1
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+
+        # A value cut off by the end of the buffer (e.g. "1." of "1.5") can
+        # still decode, so only accept it when a delimiter follows
+        delimiter = end
+        while delimiter < len(buffer) and buffer[delimiter] in _WHITESPACE:
+            delimiter += 1
+        if delimiter >= len(buffer) or buffer[delimiter] not in ",]":
+            if not eof and fill():
+                continue
+            if delimiter < len(buffer):
+                raise ValueError(f"Unexpected {buffer[delimiter]!r} in JSON array")
+        pos = end
+        yield item
+
+
+def parse_order(row: Dict, source: str) -> Dict:
+    """Convert a raw source record into typed order fields"""
+    row["order_date"] = datetime.fromisoformat(row["order_date"].replace("Z", "+00:00"))
+    row["quantity"] = int(row["quantity"])
+    row["unit_price"] = float(row["unit_price"])
+    row["total_amount"] = float(row["total_amount"])
+    row["source"] = source
+    return row
+
+
+def read_source_a(path: str = SOURCE_A_FILE) -> Iterator[Dict]:
+    """Stream typed orders from the source A JSON file"""
+    with open(path, "r") as f:
+        for row in iter_json_array(f):
+            yield parse_order(row, "source_a")
+
+
+def read_source_b(path: str = SOURCE_B_FILE) -> Iterator[Dict]:
+    """Stream typed orders from the source B CSV file, one row at a time"""
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            yield parse_order(row, "source_b")
+
+
+class _ShardDecoder:
+    """Decodes JSON values at byte offsets of a memory map through a text buffer that moves forward.
+
+    Each chunk of the file is decoded from UTF-8 once and values are
+    decoded in place, instead of copying and decoding a window per value.
+    Successive offsets must only move forward over ASCII bytes, such as the
+    whitespace and commas between items; pass ``resync`` to jump anywhere.
+    """
+
+    def __init__(self, mm: mmap.mmap, chunk_size: int = READ_CHUNK_SIZE):
+        self.mm = mm
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self._reset(0)
+
+    def _reset(self, pos: int):
+        self.text = ""
+        # A byte offset and the index of the same position in ``text``
+        self.cursor = (pos, 0)
+        self.read_end = pos
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def _extend(self) -> bool:
+        """Drop the text before the cursor and decode the next chunk; False at the end of the file"""
+        if self.read_end >= len(self.mm):
+            return False
+        cursor_byte, cursor_index = self.cursor
+        chunk = self.mm[self.read_end:self.read_end + self.chunk_size]
+        self.read_end += len(chunk)
+        # A multi-byte character cut off by the chunk is held back until the next one
+        self.text = self.text[cursor_index:] + self._utf8.decode(chunk, final=self.read_end >= len(self.mm))
+        self.cursor = (cursor_byte, 0)
+        return True
+
+    def decode_at(self, pos: int, resync: bool = False) -> Tuple[Any, int]:
+        """Decode the JSON value starting at byte ``pos``; returns it and its end offset"""
+        if resync or pos < self.cursor[0]:
+            self._reset(pos)
+        while True:
+            cursor_byte, cursor_index = self.cursor
+            index = cursor_index + pos - cursor_byte
+            try:
+                item, end = self.decoder.raw_decode(self.text, index)
+                break
+            except json.JSONDecodeError:
+                if not self._extend():
+                    raise
+        value = self.text[index:end]
+        item_end = pos + (len(value) if value.isascii() else len(value.encode("utf-8")))
+        self.cursor = (item_end, end)
+        return item, item_end
+
+
+def _skip_whitespace(mm: mmap.mmap, pos: int) -> int:
+    while pos < len(mm) and mm[pos:pos + 1] in _WHITESPACE_BYTES:
+        pos += 1
+    return pos
+
+
+def _previous_token(mm: mmap.mmap, pos: int) -> bytes:
+    pos -= 1
+    while pos >= 0 and mm[pos:pos + 1] in _WHITESPACE_BYTES:
+        pos -= 1
+    return mm[pos:pos + 1]
+
+
+def iter_json_shard(path: str, start: int, end: int) -> Iterator[Dict]:
+    """Orders of a JSON array file whose opening brace lies in [start, end).
+
+    A shard starting mid-file resynchronizes on the first ``{`` that follows
+    a ``[`` or ``,`` and decodes to an object with an ``order_id``, so braces
+    inside nested objects or string values are skipped. Consecutive shards
+    therefore yield every item of the array exactly once.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            values = _ShardDecoder(mm)
+            pos = mm.find(b"{", start, end)
+            while pos != -1:
+                if _previous_token(mm, pos) in (b"[", b","):
+                    try:
+                        item, item_end = values.decode_at(pos, resync=True)
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict) and "order_id" in item:
+                        break
+                pos = mm.find(b"{", pos + 1, end)
+            if pos == -1:
+                return
+
+            while True:
+                yield item
+                pos = _skip_whitespace(mm, item_end)
+                if mm[pos:pos + 1] == b"]":
+                    return
+                if mm[pos:pos + 1] != b",":
+                    raise ValueError(f"Expected ',' or ']' at byte {pos} of {path}")
+                pos = _skip_whitespace(mm, pos + 1)
+                if pos >= end:
+                    return
+                item, item_end = values.decode_at(pos)
+
+
+def iter_csv_shard(path: str, start: int, end: int) -> Iterator[Dict]:
+    """Rows of a CSV file whose line starts in [start, end).
+
+    Records must not contain embedded newlines, which holds for the source
+    files; a line is owned by the shard its first byte falls in.
+    """
+    with open(path, "rb") as f:
+        fieldnames = next(csv.reader([f.readline().decode("utf-8")]), None)
+        if not fieldnames:
+            return
+        if start > f.tell():
+            # Skip the line that started in the previous shard
+            f.seek(start - 1)
+            f.readline()
+
+        def lines() -> Iterator[str]:
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    return
+                yield line.decode("utf-8")
+
+        yield from csv.DictReader(lines(), fieldnames=fieldnames)
+
+
+def read_source_a_shard(path: str, start: int, end: int) -> Iterator[Dict]:
+    """Typed source A orders starting in a byte range of the JSON file"""
+    for row in iter_json_shard(path, start, end):
+        yield parse_order(row, "source_a")
+
+
+def read_source_b_shard(path: str, start: int, end: int) -> Iterator[Dict]:
+    """Typed source B orders starting in a byte range of the CSV file"""
+    for row in iter_csv_shard(path, start, end):
+        yield parse_order(row, "source_b")
+
+
+SOURCE_READERS = {"source_a": read_source_a, "source_b": read_source_b}
+SHARD_READERS = {"source_a": read_source_a_shard, "source_b": read_source_b_shard}
+SOURCE_FILES = {"source_a": SOURCE_A_FILE, "source_b": SOURCE_B_FILE}
+
+
+def filter_orders(
+    orders: Iterable[Dict],
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    categories: Optional[List[str]] = None,
+) -> Iterator[Dict]:
+    """Lazily apply the task's date range and category filters"""
+    category_set = set(categories) if categories else None
+    for order in orders:
+        # Apply date filter only if dates are specified
+        if date_from and date_to and not (date_from <= order["order_date"] <= date_to):
+            continue
+        # Apply category filter only if categories are specified
+        if category_set and order["product_category"] not in category_set:
+            continue
+        yield order
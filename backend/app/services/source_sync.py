@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import SourceSyncState
+from .metrics import SOURCE_BYTES_READ
+from .order_store import upsert_source_orders
+from .parse_pool import parse_pool
+from .source_readers import SHARD_READERS, SOURCE_FILES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_CHUNK_SIZE = int(os.getenv("SOURCE_SYNC_CHUNK_SIZE", "5000"))
+# Bytes hashed at the start of the file and just before the watermark
+FINGERPRINT_BYTES = 4096
+
+_sync_locks: Dict[str, asyncio.Lock] = {}
+
+
+@dataclass
+class SyncResult:
+    source: str
+    mode: str  # 'unchanged', 'append' or 'full'
+    rows: int
+    byte_offset: int
+    max_order_date: Optional[datetime] = None
+
+
+def record_end_offset(path: str, source: str) -> int:
+    """Offset just past the last complete record of a source file.
+
+    For the CSV file that is the end of its last full line; for the JSON
+    array it is the closing brace of the last item, before the ``]`` that
+    moves whenever items are appended.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if source == "source_a":
+                return mm.rfind(b"}") + 1
+            return mm.rfind(b"\n") + 1
+
+
+def fingerprint(path: str, offset: int) -> str:
+    """Hash of the head of the file and of the bytes just before ``offset``.
+
+    An append leaves both unchanged; a rewrite of the file almost always
+    changes one of them.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(min(offset, FINGERPRINT_BYTES)))
+        tail = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(tail)
+        digest.update(f.read(offset - tail))
+    return digest.hexdigest()
+
+
+def _plan(state: SourceSyncState, source: str, path: str) -> Tuple[str, int, int, int]:
+    """Mode, start and end offsets and file size of the next sync of ``path``"""
+    size = os.path.getsize(path)
+    end = record_end_offset(path, source)
+    if (
+        state.path == path
+        and state.byte_offset is not None
+        and state.byte_offset <= end
+        and fingerprint(path, state.byte_offset) == state.fingerprint
+    ):
+        if state.byte_offset == end:
+            return "unchanged", end, end, size
+        # Records were only appended: load the new ones
+        return "append", state.byte_offset, end, size
+    return "full", 0, end, size
+
+
+async def _iter_batches(source: str, path: str, start: int, end: int, chunk_size: int) -> AsyncIterator[List[Dict]]:
+    """Orders starting in [start, end) of a source file, in batches"""
+    if parse_pool.enabled:
+        async for batch in parse_pool.stream_orders(path, source, start=start, end=end):
+            for offset in range(0, len(batch), chunk_size):
+                yield batch[offset:offset + chunk_size]
+        return
+    SOURCE_BYTES_READ.inc(end - start, source=source)
+    rows = SHARD_READERS[source](path, start, end)
+
+    def next_batch() -> List[Dict]:
+        return [row for _, row in zip(range(chunk_size), rows)]
+
+    while True:
+        batch = await asyncio.to_thread(next_batch)
+        if not batch:
+            return
+        yield batch
+
+
+async def _sync_state(db: AsyncSession, source: str) -> SourceSyncState:
+    """The source's watermark row, created empty on its first sync"""
+    state = await db.get(SourceSyncState, source)
+    if state is not None:
+        return state
+    try:
+        db.add(SourceSyncState(source=source, rows_synced=0))
+        await db.commit()
+    except IntegrityError:
+        # Another process created it first; use theirs
+        await db.rollback()
+    return await db.get(SourceSyncState, source, populate_existing=True)
+
+
+async def sync_source(
+    db: AsyncSession,
+    source: str,
+    path: Optional[str] = None,
+    chunk_size: int = DEFAULT_SYNC_CHUNK_SIZE,
+) -> SyncResult:
+    """Load the records of a source file added or changed since its last sync.
+
+    The watermark in ``source_sync_state`` is the byte offset past the last
+    record loaded and a fingerprint of the bytes before it. When the file
+    only grew, just the bytes after the offset are parsed; otherwise the
+    whole file is read again. Either way records are merged into
+    ``source_orders`` with an upsert, so unchanged orders keep their
+    ``synced_at``. Orders removed from the file are kept.
+    """
+    path = path or SOURCE_FILES[source]
+    # Syncs of one source in this process run one at a time
+    async with _sync_locks.setdefault(source, asyncio.Lock()):
+        state = await _sync_state(db, source)
+        mode, start, end, size = await asyncio.to_thread(_plan, state, source, path)
+
+        rows = 0
+        # A full sync re-reads every record, so the maximum is recomputed
+        max_order_date = None if mode == "full" else state.max_order_date
+        if mode != "unchanged":
+            logger.info("Syncing %s (%s) from byte %s to %s of %s", source, mode, start, end, path)
+            statement = upsert_source_orders(db.get_bind().dialect.name)
+            async for batch in _iter_batches(source, path, start, end, chunk_size):
+                now = datetime.utcnow()
+                for order in batch:
+                    order["synced_at"] = now
+                await db.execute(statement, batch)
+                # Committed per batch so the write lock is not held for the whole file
+                await db.commit()
+                rows += len(batch)
+                latest = max(order["order_date"] for order in batch)
+                if latest.tzinfo is not None:
+                    latest = latest.astimezone(timezone.utc).replace(tzinfo=None)
+                max_order_date = latest if max_order_date is None else max(max_order_date, latest)
+
+        # The watermark only moves once every record before it is stored
+        state.path = path
+        state.byte_offset = end
+        state.fingerprint = await asyncio.to_thread(fingerprint, path, end)
+        state.file_size = size
+        state.max_order_date = max_order_date
+        state.rows_synced = (state.rows_synced or 0) + rows
+        state.synced_at = datetime.utcnow()
+        await db.commit()
+    if rows:
+        logger.info("Synced %s %s records, watermark at byte %s", rows, source, end)
+    return SyncResult(source=source, mode=mode, rows=rows, byte_offset=end, max_order_date=max_order_date)
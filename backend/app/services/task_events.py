@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class TaskEventBroker:
+    """Fans out task status transitions and ingest progress to stream subscribers.
+
+    Each subscriber gets its own bounded queue. A subscriber that stops
+    reading loses its oldest events instead of holding up publishers.
+    Subscribers live in this process only: with several processes draining
+    the task queue, a stream only carries the events of tasks processed
+    here, and clients must poll for the rest.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.events_published = 0
+        self.events_dropped = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: Dict):
+        """Deliver an event to every subscriber without blocking"""
+        self.events_published += 1
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.events_dropped += 1
+            queue.put_nowait(event)
+
+    def publish_status(self, task, **extra):
+        self.publish({
+            "type": "status",
+            "task_id": task.id,
+            "status": task.status.value,
+            "completed_at": task.completed_at,
+            "source_errors": task.source_errors,
+            **extra,
+        })
+
+    def publish_progress(self, task_id: int, source: str, rows: int, total: Optional[int] = None):
+        self.publish({
+            "type": "progress",
+            "task_id": task_id,
+            "source": source,
+            "rows": rows,
+            "total": total,
+        })
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+task_events = TaskEventBroker()
@@ -1,36 +1,185 @@
 import asyncio
-from datetime import datetime
-from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from ..models.models import Task, Order, TaskStatus
-from .task_processor import TaskProcessor
+import hashlib
+import os
+import weakref
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Sequence, Tuple
+import orjson
+from sqlalchemy import and_, desc, exists, func, or_, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncSessionLocal
+from ..models.models import Task, TaskOrder, TaskQueueEntry, TaskStatus, TaskRollup, TaskCountryRollup
+from .order_query import OrderQuery
+from .order_store import task_order_rows
+from .rollups import bucket_expression
+from .task_events import task_events
+from .connectors import LEGACY_CONNECTORS, categories_from_filters
+from .metrics import DB_OPERATION_SECONDS, metrics, timed
+from .rate_limit import task_rate_limiter
+from .task_processor import TaskProcessor, TaskQueueFullError
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+# List endpoints encode rows straight to JSON instead of validating them
+# into response models first; set to false to go through the models
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+# Columns of the task list, in the order the API returns them
+TASK_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "status",
+    "created_at",
+    "completed_at",
+    "synced_at",
+    "source_errors",
+    "date_from",
+    "date_to",
+    "source_a_enabled",
+    "source_b_enabled",
+    "source_a_filters",
+    "source_b_filters",
+    "connectors",
+)
+
+# Seconds a completed task is handed out again for identical requests; 0 disables reuse
+DEFAULT_DEDUP_TTL = float(os.getenv("TASK_DEDUP_TTL", "300"))
+
+TASK_SUBMISSIONS = metrics.counter(
+    "task_submissions_total", "Task creation requests, by outcome (created, coalesced, reused, rejected)", ["outcome"]
+)
+
+# Serializes submissions of the same fingerprint within this process, so a
+# burst of identical requests creates one task and the rest coalesce onto it
+_submit_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def task_fingerprint(date_from: Optional[datetime], date_to: Optional[datetime], connectors: List[Dict]) -> str:
+    """Hash of what a task reads; requests that would match the same orders share it.
+
+    Only the parts of the filters that select orders count, so the order
+    of connectors and categories and repeated categories do not matter.
+    """
+    canonical = {
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None,
+        "connectors": sorted(
+            [c["name"], sorted(set(categories_from_filters(c.get("filters"))))] for c in connectors
+        ),
+    }
+    return hashlib.sha256(orjson.dumps(canonical)).hexdigest()
+
+
+def encode_rows(fields: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """JSON array of rows as objects keyed by ``fields``.
+
+    Rows may carry extra trailing columns, such as sort keys selected for
+    the cursor; they are left out. Datetimes, enums and JSON columns are
+    encoded by orjson itself, without building a model per row.
+    """
+    return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+
 class TaskService:
-    _processor_task = None
-    _processor = None
+    """Request-scoped task operations over a session and the app's processor"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, processor: TaskProcessor, dedup_ttl: float = DEFAULT_DEDUP_TTL):
         self.db = db
-        self._ensure_processor_running()
-        logger.info("TaskService initialized")
-
-    def _ensure_processor_running(self):
-        """Ensure the task processor is running"""
-        if TaskService._processor is None:
-            logger.info("Creating new task processor")
-            TaskService._processor = TaskProcessor(self.db)
-            
-        if TaskService._processor_task is None or TaskService._processor_task.done():
-            logger.info("Starting task processor")
-            loop = asyncio.get_event_loop()
-            TaskService._processor_task = loop.create_task(TaskService._processor.start_processing())
-            logger.info("Task processor started successfully")
+        self.processor = processor
+        self.dedup_ttl = dedup_ttl
+
+    def _resolve_connectors(
+        self,
+        source_a_enabled: bool,
+        source_b_enabled: bool,
+        source_a_filters: Optional[Dict],
+        source_b_filters: Optional[Dict],
+        connectors: Optional[List[Dict]],
+    ) -> List[Dict]:
+        """Connectors a request reads, from its connector list or legacy flags"""
+        if connectors is None:
+            connectors = [
+                {"name": "source_a", "filters": source_a_filters},
+                {"name": "source_b", "filters": source_b_filters},
+            ]
+            connectors = [c for c, enabled in zip(connectors, (source_a_enabled, source_b_enabled)) if enabled]
+        for connector in connectors:
+            self.processor.connectors.get(connector["name"])
+        return connectors
 
+    @timed(DB_OPERATION_SECONDS, operation="submit_task")
+    async def submit_task(
+        self,
+        title: str,
+        description: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        source_a_enabled: bool = True,
+        source_b_enabled: bool = True,
+        source_a_filters: Dict = None,
+        source_b_filters: Dict = None,
+        connectors: Optional[List[Dict]] = None,
+    ) -> Tuple[Task, str]:
+        """Create a task unless an identical one can answer the request.
+
+        A request with the fingerprint of a queued or running task is
+        ``coalesced`` onto it, and one matching a task completed within
+        ``dedup_ttl`` seconds ``reused`` it; the existing task keeps its
+        title. Returns the task and which of these happened, or ``created``.
+        """
+        connectors = self._resolve_connectors(
+            source_a_enabled, source_b_enabled, source_a_filters, source_b_filters, connectors
+        )
+        fingerprint = task_fingerprint(date_from, date_to, connectors)
+        lock = _submit_locks.get(fingerprint)
+        if lock is None:
+            lock = _submit_locks[fingerprint] = asyncio.Lock()
+        async with lock:
+            duplicate = await self._find_duplicate(fingerprint)
+            if duplicate is not None:
+                task, outcome = duplicate
+                logger.info("Request %s %s task %s", title, outcome, task.id)
+                TASK_SUBMISSIONS.inc(outcome=outcome)
+                return task, outcome
+            try:
+                task = await self.create_task(title, description, date_from, date_to, connectors=connectors)
+            except TaskQueueFullError:
+                TASK_SUBMISSIONS.inc(outcome="rejected")
+                raise
+        TASK_SUBMISSIONS.inc(outcome="created")
+        return task, "created"
+
+    async def _find_duplicate(self, fingerprint: str) -> Optional[Tuple[Task, str]]:
+        """Newest task with this fingerprint that is queued, running or recently completed"""
+        # A pending task without a queue entry was abandoned, not waiting
+        in_flight = and_(
+            Task.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
+            exists().where(TaskQueueEntry.task_id == Task.id),
+        )
+        candidates = [in_flight]
+        if self.dedup_ttl > 0:
+            fresh_since = datetime.utcnow() - timedelta(seconds=self.dedup_ttl)
+            candidates.append(and_(Task.status == TaskStatus.COMPLETED, Task.completed_at >= fresh_since))
+        result = await self.db.execute(
+            select(Task)
+            .where(Task.fingerprint == fingerprint, or_(*candidates))
+            .order_by(desc(Task.id))
+            .limit(1)
+        )
+        task = result.scalar_one_or_none()
+        if task is None:
+            return None
+        return task, "reused" if task.status == TaskStatus.COMPLETED else "coalesced"
+
+    @timed(DB_OPERATION_SECONDS, operation="create_task")
     async def create_task(
         self,
         title: str,
@@ -41,11 +190,23 @@ class TaskService:
         source_b_enabled: bool = True,
         source_a_filters: Dict = None,
         source_b_filters: Dict = None,
+        connectors: Optional[List[Dict]] = None,
     ) -> Task:
-        logger.info(f"Creating new task: {title}")
-        logger.info(f"Task parameters - Date range: {date_from} to {date_to}")
-        logger.info(f"Sources enabled - A: {source_a_enabled}, B: {source_b_enabled}")
-        
+        """Create and queue a task.
+
+        ``connectors`` lists the ``{"name", "filters"}`` sources to read; when
+        omitted the source_a/source_b flags and filters are used instead.
+        Raises UnknownConnectorError for names that are not registered.
+        """
+        logger.info("Creating new task: %s", title)
+        logger.debug("Task parameters - Date range: %s to %s", date_from, date_to)
+        connectors = self._resolve_connectors(
+            source_a_enabled, source_b_enabled, source_a_filters, source_b_filters, connectors
+        )
+        logger.info("Task connectors: %s", ", ".join(c["name"] for c in connectors) or "none")
+        # The legacy columns mirror the connector list for older clients
+        legacy = {c["name"]: c.get("filters") for c in connectors if c["name"] in LEGACY_CONNECTORS}
+
         task = Task(
             title=title,
             description=description,
@@ -53,40 +214,253 @@ class TaskService:
             created_at=datetime.utcnow(),
             date_from=date_from,
             date_to=date_to,
-            source_a_enabled=source_a_enabled,
-            source_b_enabled=source_b_enabled,
-            source_a_filters=source_a_filters,
-            source_b_filters=source_b_filters,
+            source_a_enabled="source_a" in legacy,
+            source_b_enabled="source_b" in legacy,
+            source_a_filters=legacy.get("source_a"),
+            source_b_filters=legacy.get("source_b"),
+            connectors=connectors,
+            fingerprint=task_fingerprint(date_from, date_to, connectors),
         )
         self.db.add(task)
-        self.db.commit()
-        self.db.refresh(task)
-        
-        logger.info(f"Task {task.id} created successfully")
+        await self.db.flush()
+        # The task and its queue entry are committed together, so a full
+        # queue rejects the task without leaving it behind
+        try:
+            waiting = await self.processor.enqueue(self.db, task.id)
+        except TaskQueueFullError:
+            await self.db.rollback()
+            logger.warning("Rejecting task %s: processing queue is full", title)
+            raise
+        await self.db.commit()
+        await self.db.refresh(task)
+        self.processor.enqueued(waiting)
+        task_events.publish_status(task, created=True)
         
-        # Add task to processor queue
-        await TaskService._processor.add_task(task.id)
-        logger.info(f"Task {task.id} added to processor queue")
+        logger.info("Task %s created and queued", task.id)
         
         return task
 
+    @timed(DB_OPERATION_SECONDS, operation="get_task_status")
     async def get_task_status(self, task_id: int) -> Task:
-        logger.info(f"Fetching status for task {task_id}")
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        logger.debug("Fetching status for task %s", task_id)
+        task = await self.db.get(Task, task_id)
         if task:
-            logger.info(f"Task {task_id} status: {task.status}")
+            logger.debug("Task %s status: %s", task_id, task.status)
         else:
-            logger.warning(f"Task {task_id} not found")
+            logger.warning("Task %s not found", task_id)
         return task
 
+    @timed(DB_OPERATION_SECONDS, operation="refresh_task")
+    async def refresh_task(self, task_id: int) -> Optional[Tuple[Task, Dict]]:
+        """Update a finished task with source records added or changed since it ran"""
+        logger.info("Refreshing task %s", task_id)
+        return await self.processor.refresh_task(task_id)
+
+    @timed(DB_OPERATION_SECONDS, operation="get_all_tasks")
     async def get_all_tasks(self) -> List[Task]:
-        logger.info("Fetching all tasks")
-        tasks = self.db.query(Task).all()
-        logger.info(f"Retrieved {len(tasks)} tasks")
+        logger.debug("Fetching all tasks")
+        tasks = (await self.db.execute(select(Task))).scalars().all()
+        logger.debug("Retrieved %s tasks", len(tasks))
         return tasks
 
-    async def get_task_data(self, task_id: int) -> List[Order]:
-        logger.info(f"Fetching data for task {task_id}")
-        orders = self.db.query(Order).filter(Order.task_id == task_id).all()
-        logger.info(f"Retrieved {len(orders)} orders for task {task_id}")
-        return orders 
\ No newline at end of file
+    @timed(DB_OPERATION_SECONDS, operation="get_all_tasks_json")
+    async def get_all_tasks_json(self) -> bytes:
+        """The task list as JSON, read as plain rows rather than ORM objects"""
+        tasks = Task.__table__
+        rows = (await self.db.execute(select(*(tasks.c[name] for name in TASK_FIELDS)))).all()
+        logger.debug("Retrieved %s tasks", len(rows))
+        return encode_rows(TASK_FIELDS, rows)
+
+    @timed(DB_OPERATION_SECONDS, operation="get_task_data")
+    async def get_task_data(
+        self,
+        task_id: int,
+        query: Optional[OrderQuery] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Row], Optional[str]]:
+        """A task's orders matching ``query`` and the cursor of the next page.
+
+        Without a ``limit`` every matching order is returned.
+        """
+        logger.debug("Fetching data for task %s", task_id)
+        query = query or OrderQuery()
+        statement = query.build(task_id, cursor)
+        if limit is not None:
+            statement = statement.limit(limit + 1)
+        orders = (await self.db.execute(statement)).all()
+
+        next_cursor = None
+        if limit is not None and len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = query.encode_cursor(orders[-1])
+        logger.debug("Retrieved %s orders for task %s", len(orders), task_id)
+        return orders, next_cursor
+
+    @timed(DB_OPERATION_SECONDS, operation="next_page_cursor")
+    async def next_page_cursor(
+        self, task_id: int, query: OrderQuery, limit: int, cursor: Optional[str] = None
+    ) -> Optional[str]:
+        """Cursor of the page after the ``limit`` orders following ``cursor``.
+
+        Streamed pages are sent before they are counted, so the last row of
+        the page is looked up first. None when no orders follow the page.
+        """
+        statement = query.build(task_id, cursor).offset(limit - 1).limit(2)
+        rows = (await self.db.execute(statement)).all()
+        if len(rows) < 2:
+            return None
+        return query.encode_cursor(rows[0])
+
+    @timed(DB_OPERATION_SECONDS, operation="has_task_data")
+    async def has_task_data(self, task_id: int) -> bool:
+        return await self._exists(select(TaskOrder.task_id).where(TaskOrder.task_id == task_id))
+
+    def stream_task_data(
+        self,
+        task_id: int,
+        query: Optional[OrderQuery] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """NDJSON lines of a task's orders, read from the database in batches"""
+        query = query or OrderQuery()
+        statement = query.build(task_id, cursor)
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        async def generate():
+            # The response outlives the request-scoped session
+            with DB_OPERATION_SECONDS.time(operation="stream_task_data"):
+                async with AsyncSessionLocal() as db:
+                    result = await db.stream(statement)
+                    fields = query.output_fields()
+                    async for rows in result.partitions(STREAM_BATCH_SIZE):
+                        yield b"".join(orjson.dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+        return generate()
+
+    def get_connectors(self) -> Dict:
+        return self.processor.connectors.get_metrics()
+
+    async def get_processor_metrics(self) -> Dict:
+        return {**await self.processor.get_metrics(), "rate_limit": task_rate_limiter.get_metrics()}
+
+    async def render_metrics(self) -> str:
+        """Every metric of this process in the Prometheus text format"""
+        await self.processor.collect_metrics()
+        return metrics.render()
+
+    @timed(DB_OPERATION_SECONDS, operation="get_task_stats")
+    async def get_task_stats(
+        self, task_id: int, top: int = 5, query: Optional[OrderQuery] = None
+    ) -> Optional[Dict]:
+        """Dashboard totals for a task's orders matching ``query``.
+
+        Unfiltered totals of a finished task come from its rollups.
+        """
+        logger.debug("Computing stats for task %s", task_id)
+        if not await self._exists(select(Task.id).where(Task.id == task_id)):
+            return None
+
+        filtered = query is not None and query.filtered
+        if not filtered and await self._has_rollups(task_id):
+            # Month rollups are the smallest set that still covers every order
+            rows = TaskRollup.__table__
+            in_task = (rows.c.task_id == task_id) & (rows.c.bucket == "month")
+            total = func.coalesce(func.sum(rows.c.total_amount), 0.0).label("total")
+            count = func.coalesce(func.sum(rows.c.order_count), 0).label("count")
+            first_order = func.min(rows.c.first_order_date)
+            last_order = func.max(rows.c.last_order_date)
+            countries = TaskCountryRollup.__table__
+            country_query = (
+                select(countries.c.customer_country, countries.c.total_amount, countries.c.order_count)
+                .where(countries.c.task_id == task_id)
+                .order_by(desc(countries.c.total_amount))
+                .limit(top)
+            )
+        else:
+            rows = task_order_rows
+            in_task = and_(rows.c.task_id == task_id, *(query.conditions() if filtered else ()))
+            total = func.coalesce(func.sum(rows.c.total_amount), 0.0).label("total")
+            count = func.count(rows.c.id).label("count")
+            first_order = func.min(rows.c.order_date)
+            last_order = func.max(rows.c.order_date)
+            country_query = (
+                select(rows.c.customer_country, total, count).where(in_task)
+                .group_by(rows.c.customer_country).order_by(desc("total")).limit(top)
+            )
+
+        totals = (await self.db.execute(select(total, count, first_order, last_order).where(in_task))).one()
+        sources = (await self.db.execute(
+            select(rows.c.source, total, count).where(in_task)
+            .group_by(rows.c.source).order_by(rows.c.source)
+        )).all()
+        categories = (await self.db.execute(
+            select(rows.c.product_category, total, count).where(in_task)
+            .group_by(rows.c.product_category).order_by(desc("total"))
+        )).all()
+        category_sources = (await self.db.execute(
+            select(rows.c.product_category, rows.c.source, total, count).where(in_task)
+            .group_by(rows.c.product_category, rows.c.source).order_by(desc("total"))
+        )).all()
+        countries = (await self.db.execute(country_query)).all()
+
+        total_sales, total_orders, first_order_date, last_order_date = totals
+        return {
+            "total_sales": total_sales,
+            "total_orders": total_orders,
+            "average_order_value": total_sales / total_orders if total_orders else 0.0,
+            "date_from": first_order_date,
+            "date_to": last_order_date,
+            "sources": [{"source": s, "total": t, "count": c} for s, t, c in sources],
+            "top_categories": [{"category": k, "total": t, "count": c} for k, t, c in categories[:top]],
+            "categories": [{"category": k, "total": t, "count": c} for k, t, c in categories],
+            "category_sources": [
+                {"category": k, "source": s, "total": t, "count": c} for k, s, t, c in category_sources
+            ],
+            "top_countries": [{"country": k, "total": t, "count": c} for k, t, c in countries],
+        }
+
+    @timed(DB_OPERATION_SECONDS, operation="get_task_timeseries")
+    async def get_task_timeseries(
+        self, task_id: int, bucket: str = "day", query: Optional[OrderQuery] = None
+    ) -> Optional[List[Dict]]:
+        """Sales per time bucket and source for a task's orders matching ``query``"""
+        logger.debug("Computing %s time series for task %s", bucket, task_id)
+        if not await self._exists(select(Task.id).where(Task.id == task_id)):
+            return None
+
+        filtered = query is not None and query.filtered
+        if not filtered and await self._has_rollups(task_id):
+            query = (
+                select(
+                    TaskRollup.period,
+                    TaskRollup.source,
+                    func.sum(TaskRollup.total_amount),
+                    func.sum(TaskRollup.order_count),
+                )
+                .where(TaskRollup.task_id == task_id, TaskRollup.bucket == bucket)
+                .group_by(TaskRollup.period, TaskRollup.source)
+                .order_by(TaskRollup.period, TaskRollup.source)
+            )
+        else:
+            orders = task_order_rows
+            period = bucket_expression(self.db.get_bind().dialect.name, bucket, orders.c.order_date).label("period")
+            query = (
+                select(period, orders.c.source, func.sum(orders.c.total_amount), func.count(orders.c.id))
+                .where(orders.c.task_id == task_id, *(query.conditions() if filtered else ()))
+                .group_by(period, orders.c.source)
+                .order_by(period, orders.c.source)
+            )
+        rows = (await self.db.execute(query)).all()
+        return [
+            {"period": p, "source": s, "total": t, "count": c} for p, s, t, c in rows
+        ]
+
+    async def _has_rollups(self, task_id: int) -> bool:
+        """Whether the task's rollups have been materialized"""
+        return await self._exists(select(TaskRollup.id).where(TaskRollup.task_id == task_id))
+
+    async def _exists(self, statement) -> bool:
+        return (await self.db.execute(statement.limit(1))).first() is not None
@@ -1,5 +1,5 @@
 import React from "react";
-import { Order } from "../types";
+import { DashboardStats } from "../types";
 import {
   Paper,
   Typography,
@@ -10,47 +10,28 @@ import {
 } from "@mui/material";
 
 interface CategorySummaryProps {
-  orders: Order[];
+  categories: DashboardStats["categories"];
 }
 
-const CategorySummary: React.FC<CategorySummaryProps> = ({ orders }) => {
-  const categoryStats = orders.reduce((acc, order) => {
-    const category = order.product_category;
-    if (!acc[category]) {
-      acc[category] = {
-        count: 0,
-        total: 0,
-        products: new Set(),
-      };
-    }
-    acc[category].count += order.quantity;
-    acc[category].total += order.total_amount;
-    acc[category].products.add(order.product_name);
-    return acc;
-  }, {} as Record<string, { count: number; total: number; products: Set<string> }>);
-
-  const sortedCategories = Object.entries(categoryStats).sort(
-    ([, a], [, b]) => b.total - a.total,
-  );
-
+const CategorySummary: React.FC<CategorySummaryProps> = ({ categories }) => {
   return (
     <Paper sx={{ p: 2, mb: 2 }}>
       <Typography variant='h6' gutterBottom>
         Category Summary
       </Typography>
       <List>
-        {sortedCategories.map(([category, stats], index) => (
-          <React.Fragment key={category}>
+        {categories.map((category, index) => (
+          <React.Fragment key={category.category}>
             <ListItem>
               <ListItemText
-                primary={category}
-                secondary={`${stats.products.size} unique products, ${stats.count} items sold`}
+                primary={category.category}
+                secondary={`${category.count} orders`}
               />
               <Typography variant='body2' color='text.secondary'>
-                ${stats.total.toFixed(2)}
+                ${category.total.toFixed(2)}
               </Typography>
             </ListItem>
-            {index < sortedCategories.length - 1 && <Divider />}
+            {index < categories.length - 1 && <Divider />}
           </React.Fragment>
         ))}
       </List>
@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import {
   Table,
   TableBody,
@@ -11,12 +11,14 @@ import {
   TableSortLabel,
   Button,
   Box,
+  CircularProgress,
 } from "@mui/material";
 import { Order } from "../types";
 import DownloadIcon from "@mui/icons-material/Download";
+import { fetchAllOrders, fetchOrdersPage } from "../services/dataService.ts";
 
 interface SalesTableProps {
-  orders: Order[];
+  taskId: number;
 }
 
 // Add type for sort order
@@ -74,12 +76,35 @@ const StyledTableRow = styled(TableRow)<{ source: string }>(
   }),
 );
 
-const SalesTable: React.FC<SalesTableProps> = ({ orders }) => {
+const SalesTable: React.FC<SalesTableProps> = ({ taskId }) => {
   // Add state for sorting
   const [sortConfig, setSortConfig] = useState<TableSortConfig>({
     field: "order_date",
     order: "desc",
   });
+  const [orders, setOrders] = useState<Order[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
+
+  // The backend sorts, so only the rows on screen are downloaded
+  const sort = `${sortConfig.order === "desc" ? "-" : ""}${sortConfig.field}`;
+
+  const loadPage = async (cursor: string | null) => {
+    setLoading(true);
+    try {
+      const page = await fetchOrdersPage(taskId, { sort }, cursor);
+      setOrders((prev) => (cursor ? [...prev, ...page.orders] : page.orders));
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  useEffect(() => {
+    loadPage(null);
+  }, [taskId, sort]);
 
   // Add sorting function
   const handleSort = (field: keyof Order) => {
@@ -92,33 +117,8 @@ const SalesTable: React.FC<SalesTableProps> = ({ orders }) => {
     });
   };
 
-  // Add sorting logic
-  const sortedOrders = [...orders].sort((a, b) => {
-    const aValue = a[sortConfig.field];
-    const bValue = b[sortConfig.field];
-
-    if (typeof aValue === "string" && typeof bValue === "string") {
-      return sortConfig.order === "asc"
-        ? aValue.localeCompare(bValue)
-        : bValue.localeCompare(aValue);
-    }
-
-    if (typeof aValue === "number" && typeof bValue === "number") {
-      return sortConfig.order === "asc" ? aValue - bValue : bValue - aValue;
-    }
-
-    // Handle dates
-    if (sortConfig.field === "order_date") {
-      const aDate = new Date(aValue as string).getTime();
-      const bDate = new Date(bValue as string).getTime();
-      return sortConfig.order === "asc" ? aDate - bDate : bDate - aDate;
-    }
-
-    return 0;
-  });
-
   // Add CSV export function
-  const exportToCSV = () => {
+  const exportToCSV = async () => {
     // Define CSV headers
     const headers = [
       "Order ID",
@@ -133,8 +133,11 @@ const SalesTable: React.FC<SalesTableProps> = ({ orders }) => {
       "Country",
     ];
 
+    // The export covers every order, not just the loaded pages
+    const allOrders = await fetchAllOrders(taskId, { sort });
+
     // Convert orders to CSV rows
-    const csvRows = sortedOrders.map((order) => [
+    const csvRows = allOrders.map((order) => [
       order.order_id,
       order.source === "source_a" ? "Shopify" : "Etsy",
       new Date(order.order_date).toLocaleString(),
@@ -278,19 +281,7 @@ const SalesTable: React.FC<SalesTableProps> = ({ orders }) => {
                   Total Amount
                 </TableSortLabel>
               </StyledTableHeaderCell>
-              <StyledTableHeaderCell>
-                <TableSortLabel
-                  active={sortConfig.field === "customer_id"}
-                  direction={
-                    sortConfig.field === "customer_id"
-                      ? sortConfig.order
-                      : "asc"
-                  }
-                  onClick={() => handleSort("customer_id")}
-                >
-                  Customer
-                </TableSortLabel>
-              </StyledTableHeaderCell>
+              <StyledTableHeaderCell>Customer</StyledTableHeaderCell>
               <StyledTableHeaderCell>
                 <TableSortLabel
                   active={sortConfig.field === "customer_country"}
@@ -307,7 +298,7 @@ const SalesTable: React.FC<SalesTableProps> = ({ orders }) => {
             </TableRow>
           </TableHead>
           <TableBody>
-            {sortedOrders.map((order) => (
+            {orders.map((order) => (
               <StyledTableRow
                 key={`${order.source}-${order.order_id}`}
                 source={order.source}
@@ -331,6 +322,17 @@ const SalesTable: React.FC<SalesTableProps> = ({ orders }) => {
           </TableBody>
         </Table>
       </StyledTableContainer>
+      {(loading || nextCursor) && (
+        <Box sx={{ p: 2, display: "flex", justifyContent: "center" }}>
+          {loading ? (
+            <CircularProgress size={24} />
+          ) : (
+            <Button variant='outlined' onClick={() => loadPage(nextCursor)}>
+              Load More
+            </Button>
+          )}
+        </Box>
+      )}
     </Paper>
   );
 };
@@ -1,8 +1,15 @@
-import React, { useState, useMemo } from "react";
+import React, { useState, useMemo, useEffect } from "react";
 import { Box, Button } from "@mui/material";
 
-import { Order } from "../types";
+import { DashboardStats, Order } from "../types";
 import PrintIcon from "@mui/icons-material/Print";
+import {
+  fetchAllOrders,
+  fetchTaskStats,
+  fetchTaskTimeSeries,
+  OrderFilters,
+  TimeSeriesPoint,
+} from "../services/dataService.ts";
 
 import GlobalFilters from "./visualization/GlobalFilters.tsx";
 import TimeSeriesChart from "./visualization/TimeSeriesChart.tsx";
@@ -13,7 +20,8 @@ import DetailedDataTable from "./visualization/DetailedDataTable.tsx";
 
 interface TaskDataVisualizationProps {
   taskId: number;
-  orders: Order[];
+  // Unfiltered stats of the task, used for the filter options
+  stats: DashboardStats;
   taskStartDate?: string | null;
   taskEndDate?: string | null;
 }
@@ -31,7 +39,7 @@ interface TableSortConfig {
 
 const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
   taskId,
-  orders,
+  stats,
   taskStartDate,
   taskEndDate,
 }) => {
@@ -73,37 +81,28 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
     metric: "orders" as "orders" | "amount",
     source: "all",
   });
+  const [filteredStats, setFilteredStats] = useState<DashboardStats>(stats);
+  const [timeSeries, setTimeSeries] = useState<TimeSeriesPoint[]>([]);
 
-  // Memoized filtered data
-  const filteredData = useMemo(() => {
-    return orders.filter((order) => {
-      const orderDate = new Date(order.order_date);
-      const now = new Date();
-      const thirtyDaysAgo = new Date(now.setDate(now.getDate() - 30));
-
-      let dateMatch = true;
-      if (filters.dateRange === "30days") {
-        dateMatch = orderDate >= thirtyDaysAgo;
-      } else if (
-        filters.dateRange === "custom" &&
-        filters.startDate &&
-        filters.endDate
-      ) {
-        dateMatch =
-          orderDate >= filters.startDate && orderDate <= filters.endDate;
-      }
-
-      const sourceMatch =
-        filters.source === "all" || order.source === filters.source;
-
-      const categoryMatch =
-        filters.category === "all" ||
-        order.product_category === filters.category;
-
-      return dateMatch && sourceMatch && categoryMatch;
-    });
+  // Global filters as query parameters, applied by the backend
+  const orderFilters = useMemo((): OrderFilters => {
+    const query: OrderFilters = {};
+    if (filters.dateRange === "30days") {
+      const thirtyDaysAgo = new Date();
+      thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30);
+      query.date_from = thirtyDaysAgo.toISOString();
+    } else if (filters.dateRange === "custom") {
+      query.date_from = filters.startDate?.toISOString();
+      query.date_to = filters.endDate?.toISOString();
+    }
+    if (filters.source !== "all") {
+      query.source = [filters.source];
+    }
+    if (filters.category !== "all") {
+      query.category = [filters.category];
+    }
+    return query;
   }, [
-    orders,
     filters.dateRange,
     filters.startDate,
     filters.endDate,
@@ -111,19 +110,37 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
     filters.category,
   ]);
 
-  // Get unique sources and categories for filters
+  useEffect(() => {
+    const fetchAggregates = async () => {
+      try {
+        const [statsData, timeSeriesData] = await Promise.all([
+          fetchTaskStats(taskId, orderFilters),
+          fetchTaskTimeSeries(taskId, "day", orderFilters),
+        ]);
+        setFilteredStats(statsData);
+        setTimeSeries(timeSeriesData);
+      } catch (err) {
+        console.error(err);
+      }
+    };
+
+    fetchAggregates();
+  }, [taskId, orderFilters]);
 
   const categories = useMemo(
-    () => Array.from(new Set(orders.map((order) => order.product_category))),
-    [orders],
+    () => stats.categories.map((category) => category.category),
+    [stats],
   );
 
+  const sort = `${sortConfig.order === "desc" ? "-" : ""}${sortConfig.field}`;
+
   // Add CSV export functionality
-  const handleExportCSV = () => {
+  const handleExportCSV = async () => {
+    const orders = await fetchAllOrders(taskId, { ...orderFilters, sort });
     const headers = ["Order ID", "Date", "Amount", "Category", "Source"];
     const csvContent = [
       headers.join(","),
-      ...filteredData.map((order) =>
+      ...orders.map((order) =>
         [
           order.order_id,
           new Date(order.order_date).toISOString(),
@@ -192,7 +209,7 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
 
       <Box sx={{ display: "flex", flexDirection: "column", gap: 3 }}>
         <TimeSeriesChart
-          orders={filteredData}
+          points={timeSeries}
           timeSeriesFilters={timeSeriesFilters}
           chartConfig={chartConfig}
           dateRange={{
@@ -208,8 +225,8 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
         <Box sx={{ display: "flex", gap: 3 }}>
           <Box sx={{ flex: 1 }}>
             <CategoryChart
-              orders={filteredData}
-              categories={categories}
+              categories={filteredStats.categories}
+              categorySources={filteredStats.categorySources}
               categoryFilters={categoryFilters}
               expandedChart={expandedChart}
               onCategoryFiltersChange={handleCategoryFiltersChange}
@@ -218,8 +235,8 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
           </Box>
           <Box sx={{ flex: 1 }}>
             <DistributionChart
-              orders={filteredData}
-              categories={categories}
+              categories={filteredStats.categories}
+              categorySources={filteredStats.categorySources}
               distributionFilters={distributionFilters}
               expandedChart={expandedChart}
               onDistributionFiltersChange={handleDistributionFiltersChange}
@@ -229,7 +246,7 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
         </Box>
 
         <SourcePerformance
-          orders={filteredData}
+          sources={filteredStats.sources}
           sourceTableSort={sourceTableSort}
           onSourceTableSort={(field) =>
             setSourceTableSort({
@@ -244,7 +261,9 @@ const TaskDataVisualization: React.FC<TaskDataVisualizationProps> = ({
         />
 
         <DetailedDataTable
-          orders={filteredData}
+          taskId={taskId}
+          filters={orderFilters}
+          sort={sort}
           sortConfig={sortConfig}
           onSort={(field) =>
             setSortConfig({
@@ -2,7 +2,19 @@ import React from "react";
 import { Box, Typography } from "@mui/material";
 import { styled, keyframes } from "@mui/material/styles";
 
-export type TaskStatus = "pending" | "in_progress" | "completed";
+export type TaskStatus =
+  | "pending"
+  | "in_progress"
+  | "completed"
+  | "partially_completed"
+  | "failed";
+
+// A partially completed task has finished, but some of its sources failed
+export const isTaskFinished = (status: string) =>
+  status === "completed" || status === "partially_completed";
+
+// A failed task ran out of attempts and is not retried again
+export const isTaskFailed = (status: string) => status === "failed";
 
 interface TaskProgressProps {
   status: TaskStatus;
@@ -110,6 +122,7 @@ const TaskProgress: React.FC<TaskProgressProps> = ({
   const getStepState = (step: TaskStatus) => {
     switch (status) {
       case "completed":
+      case "partially_completed":
         return { active: false, completed: true };
       case "in_progress":
         return {
@@ -129,6 +142,7 @@ const TaskProgress: React.FC<TaskProgressProps> = ({
   const getLineState = (position: "first" | "second") => {
     switch (status) {
       case "completed":
+      case "partially_completed":
         return { active: false, completed: true };
       case "in_progress":
         return {
@@ -1,5 +0,0 @@
-export { TimeSeriesChart } from "./TimeSeriesChart.tsx";
-export { CategoryChart } from "./CategoryChart.tsx";
-export { DistributionChart } from "./DistributionChart.tsx";
-export { ChartControls } from "./ChartControls.tsx";
-export { ChartModal } from "./ChartModal.tsx";
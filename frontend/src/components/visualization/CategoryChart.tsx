@@ -13,12 +13,12 @@ import {
 } from "@mui/material";
 import FullscreenIcon from "@mui/icons-material/Fullscreen";
 import FullscreenExitIcon from "@mui/icons-material/FullscreenExit";
-import { Order } from "../../types/index.ts";
+import { DashboardStats } from "../../types/index.ts";
 import D3Chart from "../D3Chart.tsx";
 
 interface CategoryChartProps {
-  orders: Order[];
-  categories: string[];
+  categories: DashboardStats["categories"];
+  categorySources: DashboardStats["categorySources"];
   categoryFilters: {
     source: string;
     sortBy: "amount" | "count";
@@ -32,8 +32,8 @@ interface CategoryChartProps {
 }
 
 const CategoryChart: React.FC<CategoryChartProps> = ({
-  orders,
   categories,
+  categorySources,
   categoryFilters,
   expandedChart,
   onCategoryFiltersChange,
@@ -41,31 +41,23 @@ const CategoryChart: React.FC<CategoryChartProps> = ({
 }) => {
   const categoryData = useMemo(() => {
     const sourceFilter = categoryFilters.source;
-    const filteredOrders =
+    const totals =
       sourceFilter === "all"
-        ? orders
-        : orders.filter((order) => order.source === sourceFilter);
+        ? categories
+        : categorySources.filter((row) => row.source === sourceFilter);
 
-    return categories
-      .map((category) => {
-        const categoryOrders = filteredOrders.filter(
-          (order) => order.product_category === category,
-        );
-        return {
-          category,
-          amount: categoryOrders.reduce(
-            (sum, order) => sum + order.total_amount,
-            0,
-          ),
-          count: categoryOrders.length,
-        };
-      })
+    return totals
+      .map((row) => ({
+        category: row.category,
+        amount: row.total,
+        count: row.count,
+      }))
       .sort((a, b) =>
         categoryFilters.sortBy === "amount"
           ? b.amount - a.amount
           : b.count - a.count,
       );
-  }, [orders, categoryFilters, categories]);
+  }, [categories, categorySources, categoryFilters]);
 
   const modalStyle = {
     position: "absolute",
@@ -1,4 +1,4 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import {
   TableContainer,
   Paper,
@@ -11,13 +11,18 @@ import {
   styled,
   Box,
   Button,
+  CircularProgress,
 } from "@mui/material";
 import FileDownloadIcon from "@mui/icons-material/FileDownload";
 import { Order } from "../../types/index.ts";
 import { formatDateToEST } from "../../utils/dateUtils.ts";
+import { fetchOrdersPage, OrderFilters } from "../../services/dataService.ts";
 
 interface DetailedDataTableProps {
-  orders: Order[];
+  taskId: number;
+  filters: OrderFilters;
+  // Sort parameter of the data endpoint matching sortConfig
+  sort: string;
   sortConfig: {
     field: keyof Order;
     order: "asc" | "desc";
@@ -59,36 +64,35 @@ const SourceCell = styled(TableCell)<{ source: "source_a" | "source_b" }>(
 );
 
 const DetailedDataTable: React.FC<DetailedDataTableProps> = ({
-  orders,
+  taskId,
+  filters,
+  sort,
   sortConfig,
   onSort,
   onExportCSV,
 }) => {
-  const sortData = (data: Order[]) => {
-    return [...data].sort((a, b) => {
-      const aValue = a[sortConfig.field];
-      const bValue = b[sortConfig.field];
+  const [orders, setOrders] = useState<Order[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
 
-      if (typeof aValue === "string" && typeof bValue === "string") {
-        return sortConfig.order === "asc"
-          ? aValue.localeCompare(bValue)
-          : bValue.localeCompare(aValue);
-      }
-
-      if (typeof aValue === "number" && typeof bValue === "number") {
-        return sortConfig.order === "asc" ? aValue - bValue : bValue - aValue;
-      }
-
-      if (sortConfig.field === "order_date") {
-        const aDate = new Date(aValue as string).getTime();
-        const bDate = new Date(bValue as string).getTime();
-        return sortConfig.order === "asc" ? aDate - bDate : bDate - aDate;
-      }
-
-      return 0;
-    });
+  const loadPage = async (cursor: string | null) => {
+    setLoading(true);
+    try {
+      const page = await fetchOrdersPage(taskId, { ...filters, sort }, cursor);
+      setOrders((prev) => (cursor ? [...prev, ...page.orders] : page.orders));
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
   };
 
+  // Filters and sort order are applied by the backend, a page at a time
+  useEffect(() => {
+    loadPage(null);
+  }, [taskId, filters, sort]);
+
   return (
     <>
       <Box sx={{ mb: 2, display: "flex", justifyContent: "flex-end" }}>
@@ -152,7 +156,7 @@ const DetailedDataTable: React.FC<DetailedDataTableProps> = ({
             </TableRow>
           </TableHead>
           <TableBody>
-            {sortData(orders).map((order) => (
+            {orders.map((order) => (
               <StyledTableRow
                 key={order.order_id}
                 source={order.source === "source_a" ? "source_a" : "source_b"}
@@ -171,6 +175,17 @@ const DetailedDataTable: React.FC<DetailedDataTableProps> = ({
           </TableBody>
         </Table>
       </TableContainer>
+      {(loading || nextCursor) && (
+        <Box sx={{ mt: 2, display: "flex", justifyContent: "center" }}>
+          {loading ? (
+            <CircularProgress size={24} />
+          ) : (
+            <Button variant='outlined' onClick={() => loadPage(nextCursor)}>
+              Load More
+            </Button>
+          )}
+        </Box>
+      )}
     </>
   );
 };
@@ -13,12 +13,12 @@ import {
 } from "@mui/material";
 import FullscreenIcon from "@mui/icons-material/Fullscreen";
 import FullscreenExitIcon from "@mui/icons-material/FullscreenExit";
-import { Order } from "../../types/index.ts";
+import { DashboardStats } from "../../types/index.ts";
 import D3Chart from "../D3Chart.tsx";
 
 interface DistributionChartProps {
-  orders: Order[];
-  categories: string[];
+  categories: DashboardStats["categories"];
+  categorySources: DashboardStats["categorySources"];
   distributionFilters: {
     metric: "orders" | "amount";
     source: string;
@@ -32,8 +32,8 @@ interface DistributionChartProps {
 }
 
 const DistributionChart: React.FC<DistributionChartProps> = ({
-  orders,
   categories,
+  categorySources,
   distributionFilters,
   expandedChart,
   onDistributionFiltersChange,
@@ -41,27 +41,16 @@ const DistributionChart: React.FC<DistributionChartProps> = ({
 }) => {
   const distributionData = useMemo(() => {
     const sourceFilter = distributionFilters.source;
-    const filteredOrders =
+    const totals =
       sourceFilter === "all"
-        ? orders
-        : orders.filter((order) => order.source === sourceFilter);
+        ? categories
+        : categorySources.filter((row) => row.source === sourceFilter);
 
-    if (distributionFilters.metric === "orders") {
-      return categories.map((category) => ({
-        category,
-        value: filteredOrders.filter(
-          (order) => order.product_category === category,
-        ).length,
-      }));
-    } else {
-      return categories.map((category) => ({
-        category,
-        value: filteredOrders
-          .filter((order) => order.product_category === category)
-          .reduce((sum, order) => sum + order.total_amount, 0),
-      }));
-    }
-  }, [orders, distributionFilters, categories]);
+    return totals.map((row) => ({
+      category: row.category,
+      value: distributionFilters.metric === "orders" ? row.count : row.total,
+    }));
+  }, [categories, categorySources, distributionFilters]);
 
   const modalStyle = {
     position: "absolute",
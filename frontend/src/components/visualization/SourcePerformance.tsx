@@ -10,10 +10,10 @@ import {
   TableBody,
   TableSortLabel,
 } from "@mui/material";
-import { Order } from "../../types";
+import { DashboardStats } from "../../types";
 
 interface SourcePerformanceProps {
-  orders: Order[];
+  sources: DashboardStats["sources"];
   sourceTableSort: {
     field: string;
     order: "asc" | "desc";
@@ -29,29 +29,19 @@ interface SourceData {
 }
 
 const SourcePerformance: React.FC<SourcePerformanceProps> = ({
-  orders,
+  sources,
   sourceTableSort,
   onSourceTableSort,
 }) => {
-  const prepareSourceData = (orders: Order[]): SourceData[] => {
-    const sourceData = orders.reduce((acc, order) => {
-      const source = order.source;
-      if (!acc[source]) {
-        acc[source] = {
-          source,
-          total: 0,
-          orders: 0,
-          averageOrderValue: 0,
-        };
-      }
-      acc[source].total += order.total_amount;
-      acc[source].orders += 1;
-      acc[source].averageOrderValue = acc[source].total / acc[source].orders;
-      return acc;
-    }, {} as Record<string, SourceData>);
-
-    return Object.values(sourceData);
-  };
+  const prepareSourceData = (
+    sources: DashboardStats["sources"],
+  ): SourceData[] =>
+    sources.map((source) => ({
+      source: source.source,
+      total: source.total,
+      orders: source.count,
+      averageOrderValue: source.count ? source.total / source.count : 0,
+    }));
 
   const sortSourceData = (data: SourceData[]): SourceData[] => {
     return [...data].sort((a, b) => {
@@ -122,7 +112,7 @@ const SourcePerformance: React.FC<SourcePerformanceProps> = ({
             </TableRow>
           </TableHead>
           <TableBody>
-            {sortSourceData(prepareSourceData(orders)).map((source) => (
+            {sortSourceData(prepareSourceData(sources)).map((source) => (
               <TableRow key={source.source}>
                 <TableCell>
                   {source.source === "source_a" ? "Shopify" : "Etsy"}
@@ -1,4 +1,4 @@
-import React from "react";
+import React, { useMemo } from "react";
 import {
   Paper,
   Box,
@@ -15,11 +15,11 @@ import {
 } from "@mui/material";
 import FullscreenIcon from "@mui/icons-material/Fullscreen";
 import FullscreenExitIcon from "@mui/icons-material/FullscreenExit";
-import { Order } from "../../types/index.ts";
+import { TimeSeriesPoint } from "../../services/dataService.ts";
 import D3Chart from "../D3Chart.tsx";
 
 interface TimeSeriesChartProps {
-  orders: Order[];
+  points: TimeSeriesPoint[];
   timeSeriesFilters: {
     sources: string[];
   };
@@ -37,7 +37,7 @@ interface TimeSeriesChartProps {
 }
 
 const TimeSeriesChart: React.FC<TimeSeriesChartProps> = ({
-  orders,
+  points,
   timeSeriesFilters,
   chartConfig,
   dateRange,
@@ -46,34 +46,27 @@ const TimeSeriesChart: React.FC<TimeSeriesChartProps> = ({
   onChartConfigChange,
   onExpandedChartChange,
 }) => {
-  const prepareTimeSeriesData = (orders: Order[]) => {
-    const timeSeriesData = orders.map((order) => ({
-      date: new Date(order.order_date),
-      amount: order.total_amount,
-      source: order.source,
-    }));
-
-    timeSeriesData.sort((a, b) => a.date.getTime() - b.date.getTime());
-
-    const groupedData = timeSeriesData.reduce((acc, curr) => {
-      const date = curr.date.toISOString().split("T")[0];
-      if (!acc[date]) {
-        acc[date] = {
-          date,
+  // Points arrive summed per day and source; chart one row per day
+  const data = useMemo(() => {
+    const rows = new Map<
+      string,
+      { date: string; source_a: number; source_b: number }
+    >();
+    points.forEach((point) => {
+      if (!rows.has(point.period)) {
+        rows.set(point.period, {
+          date: point.period,
           source_a: 0,
           source_b: 0,
-        };
+        });
       }
-      if (curr.source === "source_a") {
-        acc[date].source_a += curr.amount;
-      } else if (curr.source === "source_b") {
-        acc[date].source_b += curr.amount;
+      const row = rows.get(point.period)!;
+      if (point.source === "source_a" || point.source === "source_b") {
+        row[point.source] = point.total;
       }
-      return acc;
-    }, {} as Record<string, { date: string; source_a: number; source_b: number }>);
-
-    return Object.values(groupedData);
-  };
+    });
+    return Array.from(rows.values());
+  }, [points]);
 
   const modalStyle = {
     position: "absolute",
@@ -90,8 +83,6 @@ const TimeSeriesChart: React.FC<TimeSeriesChartProps> = ({
     flexDirection: "column",
   };
 
-  const data = prepareTimeSeriesData(orders);
-
   return (
     <>
       <Paper sx={{ p: 2, position: "relative" }}>
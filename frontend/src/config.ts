@@ -1,6 +1,8 @@
 // Environment variables configuration
 const config = {
   apiUrl: process.env.REACT_APP_API_URL || "http://localhost:8000",
+  // Fallback poll of unfinished tasks, for events the stream cannot deliver
+  statusPollInterval: Number(process.env.REACT_APP_STATUS_POLL_MS) || 30000,
 };
 
 export default config;
@@ -12,24 +12,23 @@ import {
   Paper,
   Grid,
 } from "@mui/material";
-import {
-  fetchTasks,
-  fetchOrdersByTaskId,
-  calculateDashboardStats,
-} from "../services/dataService.ts";
+import { fetchTasks, fetchTaskStats } from "../services/dataService.ts";
 import { useNavigate } from "react-router-dom";
-import { Order, Task } from "../types/index.ts";
+import { Task, DashboardStats as DashboardStatsData } from "../types/index.ts";
 import { DashboardStats } from "../components/DashboardStats.tsx";
 import CategorySummary from "../components/CategorySummary.tsx";
 import SalesTable from "../components/SalesTable.tsx";
-import TaskProgress from "../components/TaskProgress.tsx";
+import TaskProgress, {
+  isTaskFailed,
+  isTaskFinished,
+} from "../components/TaskProgress.tsx";
 import TopCategories from "../components/TopCategories.tsx";
 import TopCountries from "../components/TopCountries.tsx";
 
 const Dashboard: React.FC = () => {
   const [tasks, setTasks] = useState<Task[]>([]);
   const [selectedTaskId, setSelectedTaskId] = useState<number | null>(null);
-  const [orders, setOrders] = useState<Order[]>([]);
+  const [stats, setStats] = useState<DashboardStatsData | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const navigate = useNavigate();
@@ -54,23 +53,23 @@ const Dashboard: React.FC = () => {
   }, []);
 
   useEffect(() => {
-    const fetchOrdersData = async () => {
+    const fetchStatsData = async () => {
       if (!selectedTaskId) return;
 
       setLoading(true);
       try {
-        const data = await fetchOrdersByTaskId(selectedTaskId);
-        setOrders(data);
+        // Orders themselves are paged in by SalesTable
+        setStats(await fetchTaskStats(selectedTaskId));
         setError(null);
       } catch (err) {
         console.error(err);
-        setError("Failed to fetch orders");
+        setError("Failed to fetch task stats");
       } finally {
         setLoading(false);
       }
     };
 
-    fetchOrdersData();
+    fetchStatsData();
   }, [selectedTaskId]);
 
   const handleTaskChange = (event: any) => {
@@ -136,7 +135,20 @@ const Dashboard: React.FC = () => {
       );
     }
 
-    if (selectedTask.status !== "completed") {
+    if (isTaskFailed(selectedTask.status)) {
+      return (
+        <Paper sx={{ p: 4, textAlign: "center" }}>
+          <Typography variant='h6' color='error' gutterBottom>
+            Task Failed
+          </Typography>
+          <Typography variant='body1' color='text.secondary'>
+            Processing failed on every attempt. Create the task again to retry.
+          </Typography>
+        </Paper>
+      );
+    }
+
+    if (!isTaskFinished(selectedTask.status)) {
       return (
         <Paper sx={{ p: 4, textAlign: "center" }}>
           <Typography variant='h6' gutterBottom>
@@ -155,7 +167,11 @@ const Dashboard: React.FC = () => {
       );
     }
 
-    if (orders.length === 0) {
+    if (!stats) {
+      return null;
+    }
+
+    if (stats.totalOrders === 0) {
       return (
         <Paper sx={{ p: 4, textAlign: "center" }}>
           <Typography variant='h6' gutterBottom>
@@ -169,8 +185,6 @@ const Dashboard: React.FC = () => {
       );
     }
 
-    const stats = calculateDashboardStats(orders);
-
     return (
       <Box display='flex' flexDirection='column' gap={3}>
         <DashboardStats stats={stats} />
@@ -184,12 +198,12 @@ const Dashboard: React.FC = () => {
           </Grid>
         </Grid>
 
-        <CategorySummary orders={orders} />
+        <CategorySummary categories={stats.categories} />
         <Paper sx={{ p: 2 }}>
           <Typography variant='h6' gutterBottom>
-            All Orders ({orders.length})
+            All Orders ({stats.totalOrders})
           </Typography>
-          <SalesTable orders={orders} />
+          <SalesTable taskId={selectedTask.id} />
         </Paper>
       </Box>
     );
@@ -10,11 +10,20 @@ import {
   styled,
 } from "@mui/material";
 import { useNavigate, useParams } from "react-router-dom";
-import TaskProgress from "../components/TaskProgress.tsx";
+import TaskProgress, {
+  isTaskFailed,
+  isTaskFinished,
+  TaskStatus,
+} from "../components/TaskProgress.tsx";
 import TaskDataVisualization from "../components/TaskDataVisualization.tsx";
-import { Task, Order } from "../types/index.ts";
-import { fetchTask, fetchOrdersByTaskId } from "../services/dataService.ts";
+import { Task, DashboardStats } from "../types/index.ts";
+import {
+  fetchTask,
+  fetchTaskStats,
+  subscribeToTaskEvents,
+} from "../services/dataService.ts";
 import { formatDateToEST } from "../utils/dateUtils.ts";
+import config from "../config.ts";
 
 const TruncatedTitle = styled(Typography)({
   maxWidth: "calc(100% - 150px)", // Account for button width + spacing
@@ -27,9 +36,11 @@ const TaskDetail: React.FC = () => {
   const { id } = useParams();
   const navigate = useNavigate();
   const [task, setTask] = useState<Task | null>(null);
-  const [orders, setOrders] = useState<Order[]>([]);
+  const [stats, setStats] = useState<DashboardStats | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Bumped to reload the task and its stats
+  const [reloadKey, setReloadKey] = useState(0);
 
   useEffect(() => {
     const fetchData = async () => {
@@ -40,9 +51,8 @@ const TaskDetail: React.FC = () => {
         const taskData = await fetchTask(parseInt(id));
         setTask(taskData);
 
-        if (taskData.status === "completed") {
-          const ordersData = await fetchOrdersByTaskId(parseInt(id));
-          setOrders(ordersData);
+        if (isTaskFinished(taskData.status)) {
+          setStats(await fetchTaskStats(parseInt(id)));
         }
 
         setError(null);
@@ -55,7 +65,44 @@ const TaskDetail: React.FC = () => {
     };
 
     fetchData();
-  }, [id]);
+
+    if (!id) return;
+    // Reload once the task finishes instead of asking the user to refresh
+    return subscribeToTaskEvents(
+      (event) => {
+        if (event.type === "status" && isTaskFinished(event.status)) {
+          fetchData();
+        } else if (event.type === "status") {
+          setTask((prev) => (prev ? { ...prev, status: event.status } : prev));
+        }
+      },
+      { taskId: parseInt(id) },
+    );
+  }, [id, reloadKey]);
+
+  const status = task?.status;
+
+  useEffect(() => {
+    if (!id || !status || isTaskFinished(status) || isTaskFailed(status)) {
+      return;
+    }
+    // Another backend process may run the task, and its events do not
+    // reach this stream; poll slowly so the page still updates
+    const timer = setInterval(async () => {
+      try {
+        const latest = await fetchTask(parseInt(id));
+        if (latest.status === status) return;
+        if (isTaskFinished(latest.status)) {
+          setReloadKey((key) => key + 1);
+        } else {
+          setTask(latest);
+        }
+      } catch (err) {
+        console.error(err);
+      }
+    }, config.statusPollInterval);
+    return () => clearInterval(timer);
+  }, [id, status]);
 
   const renderContent = () => {
     if (loading) {
@@ -74,7 +121,20 @@ const TaskDetail: React.FC = () => {
       );
     }
 
-    if (task.status !== "completed") {
+    if (isTaskFailed(task.status)) {
+      return (
+        <Paper sx={{ p: 4, textAlign: "center" }}>
+          <Typography variant='h6' color='error' gutterBottom>
+            Task Failed
+          </Typography>
+          <Typography variant='body1' color='text.secondary'>
+            Processing failed on every attempt. Create the task again to retry.
+          </Typography>
+        </Paper>
+      );
+    }
+
+    if (!isTaskFinished(task.status)) {
       return (
         <Paper sx={{ p: 4, textAlign: "center" }}>
           <Typography variant='h6' gutterBottom>
@@ -87,7 +147,7 @@ const TaskDetail: React.FC = () => {
           </Typography>
           <Box mt={3}>
             <TaskProgress
-              status={task.status as "pending" | "in_progress" | "completed"}
+              status={task.status as TaskStatus}
               size='large'
             />
           </Box>
@@ -103,7 +163,7 @@ const TaskDetail: React.FC = () => {
       );
     }
 
-    if (!orders || orders.length === 0) {
+    if (!stats || stats.totalOrders === 0) {
       return (
         <Paper sx={{ p: 4, textAlign: "center" }}>
           <Typography variant='h6' gutterBottom>
@@ -134,11 +194,17 @@ const TaskDetail: React.FC = () => {
               Completed: {formatDateToEST(task.completed_at)}
             </Typography>
           )}
+          {task.source_errors &&
+            Object.entries(task.source_errors).map(([source, reason]) => (
+              <Typography key={source} color='error'>
+                {source} failed: {reason}
+              </Typography>
+            ))}
         </Paper>
 
         <TaskDataVisualization
           taskId={task.id}
-          orders={orders}
+          stats={stats}
           taskEndDate={task.date_to}
           taskStartDate={task.date_from}
         />
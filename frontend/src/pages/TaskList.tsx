@@ -19,14 +19,17 @@ import {
   InputAdornment,
 } from "@mui/material";
 import { Link as RouterLink } from "react-router-dom";
-import TaskProgress, { TaskStatus } from "../components/TaskProgress.tsx";
-import { Task } from "../types";
+import TaskProgress, {
+  isTaskFailed,
+  isTaskFinished,
+  TaskStatus,
+} from "../components/TaskProgress.tsx";
+import { Task, TaskEvent } from "../types";
 import config from "../config.ts";
+import { subscribeToTaskEvents } from "../services/dataService.ts";
 import { formatDateToEST } from "../utils/dateUtils.ts";
 import SearchIcon from "@mui/icons-material/Search";
 
-const POLLING_INTERVAL = 5000; // Poll every 5 seconds
-
 const StyledTableHeaderCell = styled(TableCell)(({ theme }) => ({
   backgroundColor: theme.palette.primary.main,
   color: theme.palette.primary.contrastText,
@@ -84,9 +87,12 @@ const TaskList: React.FC = () => {
   const [page, setPage] = useState(0);
   const [rowsPerPage, setRowsPerPage] = useState(10);
   const [searchQuery, setSearchQuery] = useState("");
+  const [progress, setProgress] = useState<
+    Record<number, Record<string, { rows: number; total: number | null }>>
+  >({});
 
-  const fetchTasks = async () => {
-    if (!loading) setLoading(true);
+  const fetchTasks = async (showSpinner = true) => {
+    if (showSpinner && !loading) setLoading(true);
     try {
       const response = await fetch(`${config.apiUrl}/api/tasks`, {
         headers: {
@@ -118,16 +124,62 @@ const TaskList: React.FC = () => {
     }
   };
 
+  const handleTaskEvent = (event: TaskEvent) => {
+    if (event.type === "progress") {
+      setProgress((prev) => ({
+        ...prev,
+        [event.task_id]: {
+          ...prev[event.task_id],
+          [event.source]: { rows: event.rows, total: event.total },
+        },
+      }));
+      return;
+    }
+    if (event.created) {
+      fetchTasks(false);
+      return;
+    }
+    setTasks((prev) =>
+      prev.map((task) =>
+        task.id === event.task_id
+          ? {
+              ...task,
+              status: event.status,
+              completed_at: event.completed_at ?? task.completed_at,
+              source_errors: event.source_errors,
+            }
+          : task,
+      ),
+    );
+  };
+
   useEffect(() => {
     fetchTasks();
 
-    // Set up polling
-    const pollInterval = setInterval(fetchTasks, POLLING_INTERVAL);
+    // Status changes are pushed by the server instead of polled; refetch
+    // whenever the stream (re)connects to pick up anything missed
+    const unsubscribe = subscribeToTaskEvents(handleTaskEvent, {
+      onOpen: () => fetchTasks(false),
+    });
 
-    // Cleanup polling on component unmount
-    return () => clearInterval(pollInterval);
+    return unsubscribe;
   }, []); // Empty dependency array means this effect runs once on mount
 
+  const hasUnfinishedTasks = tasks.some(
+    (task) => !isTaskFinished(task.status) && !isTaskFailed(task.status),
+  );
+
+  useEffect(() => {
+    if (!hasUnfinishedTasks) return;
+    // The stream only carries events of tasks run by the backend process it
+    // is connected to; with several processes, a slow poll catches the rest
+    const timer = setInterval(
+      () => fetchTasks(false),
+      config.statusPollInterval,
+    );
+    return () => clearInterval(timer);
+  }, [hasUnfinishedTasks]);
+
   const handleChangePage = (event: unknown, newPage: number) => {
     setPage(newPage);
   };
@@ -252,6 +304,26 @@ const TaskList: React.FC = () => {
                         size='small'
                       />
                     </Box>
+                    {task.status === "failed" && (
+                      <Typography variant='caption' color='error'>
+                        Failed
+                      </Typography>
+                    )}
+                    {task.status === "in_progress" &&
+                      progress[task.id] &&
+                      Object.entries(progress[task.id]).map(
+                        ([source, { rows, total }]) => (
+                          <Typography
+                            key={source}
+                            variant='caption'
+                            display='block'
+                          >
+                            {source}: {rows.toLocaleString()}
+                            {total !== null && `/${total.toLocaleString()}`}{" "}
+                            rows
+                          </Typography>
+                        ),
+                      )}
                   </StyledTableCell>
                   <StyledTableCell className='date-cell'>
                     {formatDateToEST(task.created_at)}
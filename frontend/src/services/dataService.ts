@@ -1,106 +1,143 @@
-import { Task } from "../types/index.ts";
+import { Task, TaskEvent } from "../types/index.ts";
 import { DashboardStats } from "../types/index.ts";
 import { Order } from "../types/index.ts";
 import config from "../config.ts";
 
-export const calculateDashboardStats = (orders: Order[]): DashboardStats => {
-  const totalSales = orders.reduce((sum, order) => sum + order.total_amount, 0);
-  const totalOrders = orders.length;
-  const sourceAOrders = orders.filter((order) => order.source === "source_a");
-  const sourceBOrders = orders.filter((order) => order.source === "source_b");
-  const totalSourceA = sourceAOrders.reduce(
-    (sum, order) => sum + order.total_amount,
-    0,
-  );
-  const totalSourceB = sourceBOrders.reduce(
-    (sum, order) => sum + order.total_amount,
-    0,
-  );
+interface TaskStatsResponse {
+  total_sales: number;
+  total_orders: number;
+  average_order_value: number;
+  date_from: string | null;
+  date_to: string | null;
+  sources: Array<{ source: string; total: number; count: number }>;
+  top_categories: Array<{ category: string; total: number; count: number }>;
+  top_countries: Array<{ country: string; total: number; count: number }>;
+  categories: Array<{ category: string; total: number; count: number }>;
+  category_sources: Array<{
+    category: string;
+    source: string;
+    total: number;
+    count: number;
+  }>;
+}
 
-  // Calculate average order value
-  const averageOrderValue = totalOrders > 0 ? totalSales / totalOrders : 0;
+export interface TimeSeriesPoint {
+  period: string;
+  source: string;
+  total: number;
+  count: number;
+}
 
-  // Calculate date range with proper validation
-  let dateRange = {
-    start: "N/A",
-    end: "N/A",
-  };
+// Filters shared by the data, stats and time series endpoints
+export interface OrderFilters {
+  source?: string[];
+  category?: string[];
+  country?: string[];
+  date_from?: string;
+  date_to?: string;
+}
 
-  if (orders.length > 0) {
-    const validDates = orders
-      .map((order) => {
-        try {
-          const date = new Date(order.order_date);
-          return isNaN(date.getTime()) ? null : date;
-        } catch {
-          return null;
-        }
-      })
-      .filter((date): date is Date => date !== null);
+export interface OrderQueryParams extends OrderFilters {
+  min_amount?: number;
+  max_amount?: number;
+  // Comma-separated keys, "-" prefix for descending, e.g. "-total_amount"
+  sort?: string;
+  // Comma-separated columns to return
+  fields?: string;
+}
 
-    if (validDates.length > 0) {
-      const minDate = new Date(Math.min(...validDates.map((d) => d.getTime())));
-      const maxDate = new Date(Math.max(...validDates.map((d) => d.getTime())));
+export interface OrdersPage {
+  orders: Order[];
+  // Pass back to fetch the following page; null on the last page
+  nextCursor: string | null;
+}
 
-      dateRange = {
-        start: minDate.toISOString().split("T")[0],
-        end: maxDate.toISOString().split("T")[0],
-      };
-    }
-  }
+export const ORDERS_PAGE_SIZE = 100;
 
-  // Calculate top categories
-  const categoryStats = orders.reduce((acc, order) => {
-    if (!acc[order.product_category]) {
-      acc[order.product_category] = { total: 0, count: 0 };
+const buildQuery = (params: object): string => {
+  const search = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value === undefined || value === null) return;
+    if (Array.isArray(value)) {
+      value.forEach((item) => search.append(key, item));
+    } else {
+      search.append(key, String(value));
     }
-    acc[order.product_category].total += order.total_amount;
-    acc[order.product_category].count += 1;
-    return acc;
-  }, {} as Record<string, { total: number; count: number }>);
-
-  const topCategories = Object.entries(categoryStats)
-    .map(([category, stats]) => ({
-      category,
-      total: stats.total,
-      count: stats.count,
-    }))
-    .sort((a, b) => b.total - a.total)
-    .slice(0, 5);
-
-  // Calculate top countries
-  const countryStats = orders.reduce((acc, order) => {
-    if (!acc[order.customer_country]) {
-      acc[order.customer_country] = { total: 0, count: 0 };
-    }
-    acc[order.customer_country].total += order.total_amount;
-    acc[order.customer_country].count += 1;
-    return acc;
-  }, {} as Record<string, { total: number; count: number }>);
+  });
+  const query = search.toString();
+  return query ? `?${query}` : "";
+};
 
-  const topCountries = Object.entries(countryStats)
-    .map(([country, stats]) => ({
-      country,
-      total: stats.total,
-      count: stats.count,
-    }))
-    .sort((a, b) => b.total - a.total)
-    .slice(0, 5);
+// Aggregates are computed by the backend, so only the totals are transferred
+export const fetchTaskStats = async (
+  taskId: number,
+  filters: OrderFilters = {},
+  top: number = 5,
+): Promise<DashboardStats> => {
+  const response = await fetch(
+    `${config.apiUrl}/api/tasks/${taskId}/stats${buildQuery({
+      ...filters,
+      top,
+    })}`,
+    {
+      headers: {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+      },
+      credentials: "include",
+    },
+  );
+  if (!response.ok) {
+    throw new Error("Failed to fetch task stats");
+  }
+  const stats: TaskStatsResponse = await response.json();
+  const source = (name: string) =>
+    stats.sources.find((s) => s.source === name) ?? { total: 0, count: 0 };
 
   return {
-    totalSales,
-    totalOrders,
-    sourceAOrders: sourceAOrders.length,
-    sourceBOrders: sourceBOrders.length,
-    totalSourceA,
-    totalSourceB,
-    averageOrderValue,
-    topCategories,
-    topCountries,
-    dateRange,
+    totalSales: stats.total_sales,
+    totalOrders: stats.total_orders,
+    sourceAOrders: source("source_a").count,
+    sourceBOrders: source("source_b").count,
+    totalSourceA: source("source_a").total,
+    totalSourceB: source("source_b").total,
+    averageOrderValue: stats.average_order_value,
+    sources: stats.sources,
+    topCategories: stats.top_categories,
+    topCountries: stats.top_countries,
+    categories: stats.categories,
+    categorySources: stats.category_sources,
+    dateRange: {
+      start: stats.date_from ? stats.date_from.split("T")[0] : "N/A",
+      end: stats.date_to ? stats.date_to.split("T")[0] : "N/A",
+    },
   };
 };
 
+export const fetchTaskTimeSeries = async (
+  taskId: number,
+  bucket: "day" | "week" | "month" = "day",
+  filters: OrderFilters = {},
+): Promise<TimeSeriesPoint[]> => {
+  const response = await fetch(
+    `${config.apiUrl}/api/tasks/${taskId}/timeseries${buildQuery({
+      ...filters,
+      bucket,
+    })}`,
+    {
+      headers: {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+      },
+      credentials: "include",
+    },
+  );
+  if (!response.ok) {
+    throw new Error("Failed to fetch task time series");
+  }
+  return response.json();
+};
+
 export const fetchTask = async (taskId: number): Promise<Task> => {
   const response = await fetch(`${config.apiUrl}/api/tasks/${taskId}`, {
     headers: {
@@ -129,16 +166,78 @@ export const fetchTasks = async (): Promise<Task[]> => {
   return response.json();
 };
 
-export const fetchOrdersByTaskId = async (taskId: number): Promise<Order[]> => {
-  const response = await fetch(`${config.apiUrl}/api/tasks/${taskId}/data`, {
-    headers: {
-      "Accept": "application/json",
-      "Content-Type": "application/json",
+// One page of a task's orders; the backend sorts and filters them
+export const fetchOrdersPage = async (
+  taskId: number,
+  params: OrderQueryParams = {},
+  cursor: string | null = null,
+  limit: number = ORDERS_PAGE_SIZE,
+): Promise<OrdersPage> => {
+  const response = await fetch(
+    `${config.apiUrl}/api/tasks/${taskId}/data${buildQuery({
+      ...params,
+      limit,
+      cursor: cursor ?? undefined,
+    })}`,
+    {
+      headers: {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+      },
+      credentials: "include",
     },
-    credentials: "include",
-  });
+  );
   if (!response.ok) {
     throw new Error("Failed to fetch orders");
   }
-  return response.json();
+  return {
+    orders: await response.json(),
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
+};
+
+// Every matching order, streamed as NDJSON; meant for exports only
+export const fetchAllOrders = async (
+  taskId: number,
+  params: OrderQueryParams = {},
+): Promise<Order[]> => {
+  const response = await fetch(
+    `${config.apiUrl}/api/tasks/${taskId}/data${buildQuery({
+      ...params,
+      format: "ndjson",
+    })}`,
+    {
+      headers: { Accept: "application/x-ndjson" },
+      credentials: "include",
+    },
+  );
+  if (!response.ok) {
+    throw new Error("Failed to fetch orders");
+  }
+  const text = await response.text();
+  return text
+    .split("\n")
+    .filter((line) => line.length > 0)
+    .map((line) => JSON.parse(line));
+};
+
+// Subscribes to task status and progress events; returns an unsubscribe function
+export const subscribeToTaskEvents = (
+  onEvent: (event: TaskEvent) => void,
+  options: { taskId?: number; onOpen?: () => void } = {},
+): (() => void) => {
+  const url = new URL(`${config.apiUrl}/api/tasks/stream`);
+  if (options.taskId !== undefined) {
+    url.searchParams.set("task_id", String(options.taskId));
+  }
+  const source = new EventSource(url.toString(), { withCredentials: true });
+  const handleMessage = (message: MessageEvent) =>
+    onEvent(JSON.parse(message.data));
+  source.addEventListener("status", handleMessage);
+  source.addEventListener("progress", handleMessage);
+  if (options.onOpen) {
+    // Also fires on reconnect, so callers can catch up on missed events
+    source.addEventListener("open", options.onOpen);
+  }
+  return () => source.close();
 };
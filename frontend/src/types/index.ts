@@ -35,8 +35,17 @@ export interface DashboardStats {
   totalSourceA: number;
   totalSourceB: number;
   averageOrderValue: number;
+  sources: Array<{ source: string; total: number; count: number }>;
   topCategories: Array<{ category: string; total: number; count: number }>;
   topCountries: Array<{ country: string; total: number; count: number }>;
+  // Every category, overall and split by source
+  categories: Array<{ category: string; total: number; count: number }>;
+  categorySources: Array<{
+    category: string;
+    source: string;
+    total: number;
+    count: number;
+  }>;
   dateRange: {
     start: string;
     end: string;
@@ -47,9 +56,15 @@ export interface Task {
   id: number;
   title: string;
   description: string;
-  status: "pending" | "in_progress" | "completed";
+  status:
+    | "pending"
+    | "in_progress"
+    | "completed"
+    | "partially_completed"
+    | "failed";
   created_at: string;
   completed_at: string;
+  source_errors?: Record<string, string> | null;
   date_from: string;
   date_to: string;
   source_a_enabled: boolean;
@@ -64,8 +79,33 @@ export interface Task {
     min_price?: number;
     max_price?: number;
   };
+  // Sources the task reads; null for tasks created with the flags above
+  connectors?: TaskConnector[] | null;
 }
 
+export interface TaskConnector {
+  name: string;
+  filters?: { categories?: string[] } | null;
+}
+
+// Pushed by the backend on GET /api/tasks/stream
+export type TaskEvent =
+  | {
+      type: "status";
+      task_id: number;
+      status: Task["status"];
+      completed_at: string | null;
+      source_errors: Record<string, string> | null;
+      created?: boolean;
+    }
+  | {
+      type: "progress";
+      task_id: number;
+      source: string;
+      rows: number;
+      total: number | null;
+    };
+
 export interface TaskFormData {
   title: string;
   description: string;
@@ -97,7 +137,6 @@ export interface TopCountry {
   totalSales: number;
 }
 
-// frontend/src/types/charts.ts
 export type ChartType = "line" | "area" | "bar" | "pie";
 export type SortOrder = "asc" | "desc";
 